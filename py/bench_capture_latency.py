@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Capture latency (p50/p95) of "full" vs "fast" capture modes against a locally served page set.
+
+The local pages mimic ad-heavy news articles: slow web fonts, an autoplay video,
+a third-party tracker script and (on every other page) background polling that
+keeps the network from ever going idle.
+
+Usage: python bench_capture_latency.py [num_pages]
+"""
+import os
+import sys
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+os.environ["ANTIGRAVITY_SCREENSHOT_CACHE"] = "0"
+
+from processor import screenshot_engine
+from processor.config import set_capture_mode
+
+SLOW_DELAY = 5.0
+
+ARTICLE_HTML = """<!doctype html>
+<html><head>
+<title>Local article {n}</title>
+<style>
+@font-face {{ font-family: Slow; src: url('/slow/font.woff2'); }}
+body {{ font-family: Slow, sans-serif; max-width: 900px; margin: auto; }}
+</style>
+<script src="http://localhost:{port}/tracker.js"></script>
+</head><body>
+<article>
+<h1>Local test article {n}</h1>
+<img src="/img/{n}.svg" width="600" height="300">
+<video src="/slow/video.mp4" autoplay muted></video>
+{paragraphs}
+</article>
+{poll}
+</body></html>
+"""
+
+POLL_SCRIPT = "<script>setInterval(() => fetch('/poll?' + Date.now()), 300);</script>"
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _send(self, body, content_type):
+        data = body.encode("utf-8") if isinstance(body, str) else body
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path.startswith("/article/"):
+            n = int(path.rsplit("/", 1)[-1])
+            paragraphs = "\n".join(f"<p>Paragraph {i} of article {n}. " + "Lorem ipsum dolor sit amet. " * 20 + "</p>" for i in range(30))
+            html = ARTICLE_HTML.format(n=n, port=self.server.server_port, paragraphs=paragraphs,
+                                       poll=POLL_SCRIPT if n % 2 else "")
+            self._send(html, "text/html")
+        elif path.startswith("/img/"):
+            self._send('<svg xmlns="http://www.w3.org/2000/svg" width="600" height="300"><rect width="600" height="300" fill="#4a90d9"/></svg>', "image/svg+xml")
+        elif path.startswith("/slow/") or path == "/tracker.js":
+            time.sleep(SLOW_DELAY)
+            self._send(b"", "application/octet-stream")
+        elif path == "/poll":
+            time.sleep(0.2)
+            self._send("{}", "application/json")
+        else:
+            self.send_error(404)
+
+def bench_capture_latency(num_pages=10):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_port
+
+    # The tracker script is served from "localhost" so fast mode can block it by host
+    screenshot_engine.BLOCKED_HOSTS.add("localhost")
+
+    urls = [f"http://127.0.0.1:{port}/article/{n}" for n in range(num_pages)]
+
+    for mode in ["full", "fast"]:
+        set_capture_mode(mode)
+        screenshot_engine._capture_latencies.clear()
+        failures = 0
+        for i, url in enumerate(urls):
+            if not screenshot_engine.capture_article_screenshot(url, f"bench_latency_{mode}_{i}"):
+                failures += 1
+        stats = screenshot_engine.get_capture_latency_stats()
+        if stats:
+            print(f"{mode:<5}: p50 {stats['p50']:6.2f}s  p95 {stats['p95']:6.2f}s  max {stats['max']:6.2f}s  "
+                  f"ok {stats['count']}/{num_pages}  failed {failures}")
+        else:
+            print(f"{mode:<5}: all {failures} captures failed")
+
+    screenshot_engine.shutdown_browser_service()
+    server.shutdown()
+
+if __name__ == "__main__":
+    bench_capture_latency(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
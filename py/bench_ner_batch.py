@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Benchmark batched GLiNER + NLTK tagging against the per-segment path.
+
+Usage: python bench_ner_batch.py [num_segments] [batch_size ...]
+"""
+import sys
+import time
+import random
+
+from processor.nlp_engine import get_entities_and_nouns, get_entities_and_nouns_batch
+
+SAMPLE_SENTENCES = [
+    "The Reserve Bank of India raised interest rates to control inflation in Mumbai.",
+    "Prime Minister Narendra Modi met the President of France at the G20 summit in New Delhi.",
+    "Climate change is affecting monsoon patterns across South Asia.",
+    "The Indian Space Research Organisation launched Chandrayaan-3 towards the Moon.",
+    "Students protested outside Delhi University against the new examination policy.",
+    "Electric vehicles are becoming popular because of rising petrol prices.",
+    "The Supreme Court delivered a landmark verdict on privacy as a fundamental right.",
+    "Virat Kohli scored a century against Australia in the Border-Gavaskar Trophy.",
+]
+
+def make_segments(n, seed=0):
+    rng = random.Random(seed)
+    segments = []
+    for _ in range(n):
+        k = rng.randint(1, 3)
+        segments.append(" ".join(rng.choice(SAMPLE_SENTENCES) for _ in range(k)))
+    return segments
+
+def bench_ner_batch(num_segments=200, batch_sizes=(4, 8, 16, 32)):
+    texts = make_segments(num_segments)
+
+    # Warm up model load and NLTK resources so they are not counted
+    get_entities_and_nouns(texts[0])
+
+    start = time.perf_counter()
+    baseline = [get_entities_and_nouns(t) for t in texts]
+    base_time = time.perf_counter() - start
+    print(f"per-segment      : {base_time:7.2f}s  ({num_segments / base_time:6.1f} seg/s)")
+
+    for bs in batch_sizes:
+        start = time.perf_counter()
+        batched = get_entities_and_nouns_batch(texts, batch_size=bs)
+        elapsed = time.perf_counter() - start
+        same = sum(
+            {e['text'] for e in a} == {e['text'] for e in b}
+            for a, b in zip(baseline, batched)
+        )
+        print(f"batch_size={bs:<5} : {elapsed:7.2f}s  ({num_segments / elapsed:6.1f} seg/s)  "
+              f"speedup x{base_time / elapsed:4.2f}  identical={same}/{num_segments}")
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    sizes = [int(x) for x in sys.argv[2:]] or [4, 8, 16, 32]
+    bench_ner_batch(n, sizes)
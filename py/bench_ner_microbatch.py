@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Load test for cross-job NER micro-batching in ml_service.
+
+Simulates N concurrent analysis jobs. Each one tags its segments the way the
+pipeline's NER stage does (small batches of 1-4 as STT emits them) either by
+calling the model directly from its own thread or through the shared NERBatcher.
+Reports segments/sec and per-call latency at each concurrency level.
+
+Usage: python bench_ner_microbatch.py [segments_per_job] [concurrency ...]
+"""
+import sys
+import time
+import random
+import threading
+
+from processor.nlp_engine import get_entities_and_nouns_batch, load_nlp_model
+from ml_service.ner_batcher import NERBatcher
+from bench_ner_batch import make_segments
+
+def _job_batches(seed, segments_per_job):
+    rng = random.Random(seed)
+    texts = make_segments(segments_per_job, seed=seed)
+    batches = []
+    i = 0
+    while i < len(texts):
+        k = rng.randint(1, 4)
+        batches.append(texts[i:i + k])
+        i += k
+    return batches
+
+def _run_jobs(predict, concurrency, segments_per_job):
+    jobs = [_job_batches(seed, segments_per_job) for seed in range(concurrency)]
+    latencies = []
+    lock = threading.Lock()
+
+    def run(batches):
+        for batch in batches:
+            start = time.perf_counter()
+            predict(batch)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=run, args=(batches,)) for batches in jobs]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    return concurrency * segments_per_job / wall, p50, p95
+
+def bench_ner_microbatch(segments_per_job=40, concurrency_levels=(1, 4, 16), max_batch=32, max_wait_ms=10):
+    load_nlp_model()
+
+    print(f"{'jobs':>4}  {'mode':<8} {'seg/s':>8} {'p50 call':>10} {'p95 call':>10}  avg batch")
+    for concurrency in concurrency_levels:
+        direct = _run_jobs(get_entities_and_nouns_batch, concurrency, segments_per_job)
+        print(f"{concurrency:>4}  {'direct':<8} {direct[0]:8.1f} {direct[1] * 1000:8.0f}ms {direct[2] * 1000:8.0f}ms")
+
+        batcher = NERBatcher(max_batch=max_batch, max_wait_ms=max_wait_ms)
+        batched = _run_jobs(batcher.predict, concurrency, segments_per_job)
+        stats = batcher.stats()
+        print(f"{concurrency:>4}  {'batched':<8} {batched[0]:8.1f} {batched[1] * 1000:8.0f}ms {batched[2] * 1000:8.0f}ms"
+              f"  {stats['avg_batch']:5.1f}  (x{batched[0] / direct[0]:4.2f})")
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    levels = [int(x) for x in sys.argv[2:]] or [1, 4, 16]
+    bench_ner_microbatch(n, levels)
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Compare single-stream Whisper against VAD-split parallel transcription.
+
+Decodes the audio of a media file once, transcribes it with the current
+single-stream path and then with the worker pool at each worker count, and
+reports the realtime factor (wall time / audio duration, lower is better),
+the speedup and how closely each transcript matches the single-stream one.
+Model load time is excluded: every configuration is warmed up first.
+
+Usage: python bench_parallel_stt.py <media_file> [workers ...]
+"""
+import os
+import sys
+import time
+import difflib
+
+def _transcript_words(segments):
+    return " ".join(seg["text"] for seg in segments).lower().split()
+
+def _run(audio):
+    from processor.speech_to_text import _stream_whisper
+    start = time.perf_counter()
+    segments, language = _stream_whisper(audio)
+    segments = list(segments)
+    return time.perf_counter() - start, segments, language
+
+def bench_parallel_stt(media_path, worker_counts=(2, 4, 8)):
+    from processor.video_processor import decode_audio, SAMPLE_RATE
+    from processor.speech_to_text import unload_whisper_model
+
+    audio = decode_audio(media_path)
+    duration = len(audio) / SAMPLE_RATE
+    warmup = audio[:10 * SAMPLE_RATE]
+    os.environ["ANTIGRAVITY_STT_PARALLEL_MIN_SECONDS"] = "0"
+
+    os.environ["ANTIGRAVITY_STT_WORKERS"] = "1"
+    _run(warmup)
+    base, base_segments, language = _run(audio)
+    reference = _transcript_words(base_segments)
+
+    print(f"\n{duration:.1f}s of audio, {os.cpu_count()} cores, language {language}\n")
+    print(f"{'mode':<14} {'wall':>8} {'RTF':>7} {'speedup':>8} {'segments':>9} {'match':>6}")
+    print(f"{'single':<14} {base:7.2f}s {base / duration:7.3f} {'x1.00':>8} {len(base_segments):>9} {'100%':>6}")
+
+    for workers in worker_counts:
+        os.environ["ANTIGRAVITY_STT_WORKERS"] = str(workers)
+        _run(warmup)
+        elapsed, segments, _ = _run(audio)
+        match = difflib.SequenceMatcher(None, reference, _transcript_words(segments), autojunk=False).ratio()
+        print(f"{f'parallel x{workers}':<14} {elapsed:7.2f}s {elapsed / duration:7.3f} {f'x{base / elapsed:.2f}':>8} "
+              f"{len(segments):>9} {match:6.0%}")
+
+    unload_whisper_model()
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    counts = [int(x) for x in sys.argv[2:]] or [2, 4, 8]
+    bench_parallel_stt(sys.argv[1], counts)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Compare render wall time for one ffmpeg process vs. the parallel chunked mode.
+
+Generates a synthetic H.264 test video with audio and a handful of overlay
+cards, then renders it with mode "full" and with mode "parallel" at several
+chunk counts (one ffmpeg process per chunk, cores shared between them).
+The render cache is disabled so every run encodes from scratch. Every output
+must have exactly as many frames as the source.
+
+Usage: python bench_render_chunks.py [duration_seconds] [chunks ...]
+"""
+import os
+import sys
+import time
+import tempfile
+import subprocess
+
+def make_test_video(path, duration, size="1280x720", fps=30, gop=60):
+    subprocess.run([
+        "ffmpeg", "-v", "error",
+        "-f", "lavfi", "-i", f"testsrc2=size={size}:rate={fps}",
+        "-f", "lavfi", "-i", "sine=frequency=440:sample_rate=44100",
+        "-t", str(duration),
+        "-c:v", "libx264", "-preset", "ultrafast", "-g", str(gop), "-pix_fmt", "yuv420p",
+        "-c:a", "aac",
+        "-y", path
+    ], check=True)
+
+def make_cards(directory, count=6):
+    from PIL import Image, ImageDraw
+
+    paths = []
+    for i in range(count):
+        img = Image.new("RGB", (1280, 800), (30 + 35 * i, 90, 160))
+        ImageDraw.Draw(img).text((60, 60), f"Card {i}", fill=(255, 255, 255))
+        path = os.path.join(directory, f"card_{i}.png")
+        img.save(path)
+        paths.append(path)
+    return paths
+
+def bench_render_chunks(duration=300, chunk_counts=(1, 4, 8, 16)):
+    work_dir = tempfile.mkdtemp(prefix="bench_render_")
+    os.environ["ANTIGRAVITY_RENDER_CACHE"] = "0"
+    os.environ["ANTIGRAVITY_RENDER_OUTPUT_DIR"] = os.path.join(work_dir, "output")
+
+    from processor.overlay_engine import render_with_screenshots, count_frames
+
+    video_path = os.path.join(work_dir, "source.mp4")
+    print(f"Generating {duration}s test video...")
+    make_test_video(video_path, duration)
+    cards = make_cards(work_dir)
+    step = duration / len(cards)
+    render_plan = [
+        {"start": i * step + 2, "end": i * step + 8, "screenshot_path": card}
+        for i, card in enumerate(cards)
+    ]
+
+    source_frames = count_frames(video_path)
+    print(f"{os.cpu_count()} cores, {len(render_plan)} cards, {source_frames} frames\n")
+
+    def check_frames(output_path):
+        frames = count_frames(output_path)
+        if frames != source_frames:
+            raise SystemExit(f"{output_path} has {frames} frames, expected {source_frames}")
+
+    start = time.perf_counter()
+    output_path = render_with_screenshots(video_path, render_plan, mode="full")
+    base = time.perf_counter() - start
+    check_frames(output_path)
+    print(f"full (1 process)   : {base:7.2f}s")
+
+    for chunks in chunk_counts:
+        os.environ["ANTIGRAVITY_RENDER_WORKERS"] = str(chunks)
+        start = time.perf_counter()
+        output_path = render_with_screenshots(video_path, render_plan, mode="parallel", chunks=chunks)
+        elapsed = time.perf_counter() - start
+        check_frames(output_path)
+        print(f"parallel chunks={chunks:<3}: {elapsed:7.2f}s  speedup x{base / elapsed:4.2f}")
+        # Output names are timestamped per second
+        time.sleep(1)
+
+    print(f"\nOutputs in {work_dir}")
+
+if __name__ == "__main__":
+    duration = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    counts = [int(x) for x in sys.argv[2:]] or [1, 4, 8, 16]
+    bench_render_chunks(duration, counts)
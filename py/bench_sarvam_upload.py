@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Exercise Sarvam chunk uploads against a local mock endpoint.
+
+The mock answers after a fixed latency, rate-limits a share of requests with 429 +
+Retry-After, and echoes the chunk index in its transcript so ordering can be checked.
+
+Usage: python bench_sarvam_upload.py [num_chunks] [workers ...]
+"""
+import os
+import re
+import sys
+import time
+import random
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+LATENCY = 0.4
+RATE_LIMIT_SHARE = 0.15
+
+class _MockSarvam(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(LATENCY)
+
+        if random.random() < RATE_LIMIT_SHARE:
+            self.send_response(429)
+            self.send_header("Retry-After", "1")
+            self.end_headers()
+            return
+
+        match = re.search(rb'filename="chunk_(\d+)\.wav"', body)
+        index = int(match.group(1)) if match else -1
+        payload = f'{{"transcript": "chunk{index} " }}'.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+def _synthetic_chunks(count, seconds=1):
+    import numpy as np
+    from processor.audio_chunker import split_into_chunks
+
+    # Short tone bursts separated by silence, split into fixed-size in-memory chunks
+    sample_rate = 16000
+    t = np.arange(sample_rate * seconds * count) / sample_rate
+    samples = (3000 * np.sin(2 * np.pi * 220 * t) * (np.sin(2 * np.pi * 0.5 * t) > 0)).astype(np.int16)
+    return split_into_chunks(samples, sample_rate, max_seconds=seconds, snap_to_silence=False)
+
+def bench_sarvam_upload(num_chunks=40, worker_counts=(1, 4, 8)):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _MockSarvam)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["SARVAM_STT_URL"] = f"http://127.0.0.1:{server.server_port}/speech-to-text"
+
+    from processor import speech_to_text
+
+    chunks = _synthetic_chunks(num_chunks)
+    for workers in worker_counts:
+        os.environ["SARVAM_MAX_WORKERS"] = str(workers)
+        speech_to_text._sarvam_session = None
+
+        start = time.perf_counter()
+        segments = list(speech_to_text._iter_sarvam_chunks(chunks, "mock-key"))
+        elapsed = time.perf_counter() - start
+
+        order = [int(seg["text"].replace("chunk", "")) for seg in segments]
+        in_order = order == sorted(order) and len(order) == num_chunks
+        print(f"workers={workers:<3}: {elapsed:6.2f}s  chunks returned {len(order)}/{num_chunks}  ordered={in_order}")
+
+    server.shutdown()
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    workers = [int(x) for x in sys.argv[2:]] or [1, 4, 8]
+    bench_sarvam_upload(n, workers)
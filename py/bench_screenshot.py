@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Compare per-capture latency of the one-shot Playwright path against the shared browser service.
+
+Usage: python bench_screenshot.py [url ...]
+"""
+import os
+import sys
+import time
+import statistics
+
+from processor.screenshot_engine import capture_article_screenshot, shutdown_browser_service
+
+DEFAULT_URLS = [
+    "https://en.wikipedia.org/wiki/Python_(programming_language)",
+    "https://en.wikipedia.org/wiki/FFmpeg",
+    "https://en.wikipedia.org/wiki/Chromium_(web_browser)",
+]
+
+def capture_article_screenshot_cold(url, filename, y_offset=0):
+    """
+    The previous one-shot path: launches and tears down Chromium for a single capture.
+    """
+    os.makedirs("output/screenshots", exist_ok=True)
+    final_output_path = f"output/screenshots/{filename}.png"
+
+    try:
+        from playwright.sync_api import sync_playwright
+
+        with sync_playwright() as p:
+            browser = p.chromium.launch(headless=True)
+            page = browser.new_page(viewport={'width': 1280, 'height': 800})
+            page.goto(url, wait_until="networkidle", timeout=60000)
+            if y_offset > 0:
+                page.evaluate(f"window.scrollTo(0, {y_offset})")
+                page.wait_for_timeout(500)
+            page.screenshot(path=final_output_path)
+            browser.close()
+
+        if os.path.exists(final_output_path):
+            return final_output_path
+
+    except Exception as e:
+        print(f"[Screenshot] Playwright Error: {e}")
+
+    return None
+
+def _time_captures(capture_fn, urls, label):
+    timings = []
+    for i, url in enumerate(urls):
+        start = time.perf_counter()
+        path = capture_fn(url, f"bench_{label}_{i}")
+        elapsed = time.perf_counter() - start
+        timings.append(elapsed)
+        print(f"  {label:<7} {elapsed:6.2f}s  {'ok' if path else 'FAILED'}  {url}")
+    return timings
+
+def bench_screenshot(urls, rounds=2):
+    urls = urls * rounds
+
+    print("One-shot browser per capture:")
+    cold = _time_captures(capture_article_screenshot_cold, urls, "cold")
+
+    print("Shared browser service:")
+    pooled = _time_captures(capture_article_screenshot, urls, "pooled")
+    shutdown_browser_service()
+
+    print()
+    print(f"cold   : mean {statistics.mean(cold):6.2f}s  median {statistics.median(cold):6.2f}s")
+    print(f"pooled : mean {statistics.mean(pooled):6.2f}s  median {statistics.median(pooled):6.2f}s "
+          f"(first capture incl. launch: {pooled[0]:.2f}s)")
+
+if __name__ == "__main__":
+    bench_screenshot(sys.argv[1:] or DEFAULT_URLS)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Compare ML service cold start and per-worker memory.
+
+Cold start: time until the service answers, then the latency of the first
+request that needs the NER model (lazy loading vs. lifespan preloading).
+Memory: RSS and PSS (proportional set size, which splits shared pages between
+the processes sharing them) per worker, for N independent uvicorn processes
+vs. the forked launcher in ml_service/serve.py.
+
+Usage: python bench_service_startup.py [workers] [port]
+"""
+import os
+import sys
+import time
+import signal
+import subprocess
+
+import requests
+
+PY_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def _wait_ready(url, timeout=300):
+    start = time.time()
+    while time.time() - start < timeout:
+        try:
+            requests.get(url, timeout=1)
+            return time.time() - start
+        except requests.RequestException:
+            time.sleep(0.1)
+    raise TimeoutError(f"{url} not ready after {timeout}s")
+
+def _first_ner_latency():
+    # Same code path the first analysis hits, measured inside a fresh interpreter
+    code = (
+        "import time\n"
+        "from ml_service.app import lifespan, app\n"
+        "import asyncio\n"
+        "async def main():\n"
+        "    t0 = time.time()\n"
+        "    async with lifespan(app):\n"
+        "        ready = time.time() - t0\n"
+        "        t1 = time.time()\n"
+        "        from processor.nlp_engine import get_entities_and_nouns_batch\n"
+        "        get_entities_and_nouns_batch(['Narendra Modi visited Chennai on Monday.'])\n"
+        "        print(f'{ready:.3f} {time.time() - t1:.3f}')\n"
+        "asyncio.run(main())\n"
+    )
+    results = {}
+    for preload in ("0", "1"):
+        env = dict(os.environ, ANTIGRAVITY_SERVICE_PRELOAD=preload)
+        out = subprocess.run([sys.executable, "-c", code], cwd=PY_DIR, env=env, capture_output=True, text=True)
+        last = out.stdout.strip().splitlines()[-1] if out.stdout.strip() else ""
+        if out.returncode != 0 or not last:
+            print(out.stderr[-2000:])
+            raise RuntimeError("Cold start measurement failed")
+        ready, first = (float(x) for x in last.split())
+        results[preload] = (ready, first)
+    return results
+
+def _memory(pid):
+    """
+    Returns (rss_mb, pss_mb) for a process from /proc/<pid>/smaps_rollup.
+    """
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0] in ("Rss:", "Pss:"):
+                values[parts[0][:-1]] = int(parts[1]) / 1024
+    return values.get("Rss", 0.0), values.get("Pss", 0.0)
+
+def _children(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+def _report(label, pids):
+    rows = [_memory(pid) for pid in pids]
+    total_rss = sum(r for r, _ in rows)
+    total_pss = sum(p for _, p in rows)
+    print(f"\n{label}")
+    for pid, (rss, pss) in zip(pids, rows):
+        print(f"  pid {pid:>7}  RSS {rss:8.1f} MB  PSS {pss:8.1f} MB")
+    print(f"  total      RSS {total_rss:8.1f} MB  PSS {total_pss:8.1f} MB")
+
+def _stop(procs):
+    for proc in procs:
+        proc.send_signal(signal.SIGTERM)
+    for proc in procs:
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+def bench_memory(workers=4, port=8600):
+    env = dict(os.environ, ANTIGRAVITY_SERVICE_PRELOAD="1")
+
+    # Today: one uvicorn process per worker, each with its own copy of the models
+    procs = []
+    start = time.time()
+    for i in range(workers):
+        procs.append(subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "ml_service.app:app", "--port", str(port + i), "--log-level", "warning"],
+            cwd=PY_DIR, env=env
+        ))
+    for i in range(workers):
+        _wait_ready(f"http://127.0.0.1:{port + i}/")
+    print(f"\nIndependent processes ready in {time.time() - start:.1f}s")
+    time.sleep(2)
+    _report(f"{workers} independent processes", [p.pid for p in procs])
+    _stop(procs)
+
+    # Forked: weights loaded once in the parent, shared copy-on-write
+    start = time.time()
+    launcher = subprocess.Popen(
+        [sys.executable, "-m", "ml_service.serve", "--workers", str(workers), "--port", str(port), "--log-level", "warning"],
+        cwd=PY_DIR, env=env
+    )
+    _wait_ready(f"http://127.0.0.1:{port}/")
+    # The socket answers as soon as one worker is up; wait for the others to finish warming
+    time.sleep(5)
+    print(f"\nForked launcher ready in {time.time() - start:.1f}s")
+    _report(f"{workers} forked workers (+ parent)", [launcher.pid] + _children(launcher.pid))
+    _stop([launcher])
+
+def bench_service_startup(workers=4, port=8600):
+    print("Cold start (lifespan ready / first NER request):")
+    results = _first_ner_latency()
+    for preload, label in (("0", "lazy"), ("1", "preloaded")):
+        ready, first = results[preload]
+        print(f"  {label:<10} ready {ready:6.2f}s   first request {first:6.2f}s   total {ready + first:6.2f}s")
+
+    if sys.platform.startswith("linux"):
+        bench_memory(workers, port)
+    else:
+        print("Memory comparison needs /proc (Linux only)")
+
+if __name__ == "__main__":
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 8600
+    bench_service_startup(workers, port)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Realtime factor and word error rate of each Whisper preset (default, fast,
+balanced, accurate) on one clip.
+
+The clip's audio is decoded once and every preset transcribes it after a short
+warm-up, so model download/load time is not counted. RTF is wall time divided
+by audio duration (lower is faster). WER is measured against a reference
+transcript (plain text file); without one, the "accurate" preset's output is
+used as the reference, so the column shows how far the faster presets drift
+from it rather than absolute accuracy.
+
+Usage: python bench_whisper_presets.py <media_file> [reference.txt] [preset ...]
+"""
+import os
+import re
+import sys
+import time
+
+def normalize_words(text):
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+def word_error_rate(reference, hypothesis):
+    """
+    (substitutions + deletions + insertions) / reference words, by word-level edit distance.
+    """
+    ref = normalize_words(reference)
+    hyp = normalize_words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h))
+        previous = current
+    return previous[-1] / len(ref)
+
+def _transcribe(audio):
+    from processor.speech_to_text import _stream_whisper
+    start = time.perf_counter()
+    segments, language = _stream_whisper(audio)
+    text = " ".join(seg["text"] for seg in segments)
+    return time.perf_counter() - start, text, language
+
+def bench_whisper_presets(media_path, reference_path=None, presets=("default", "fast", "balanced", "accurate")):
+    from processor.config import set_whisper_preset, get_whisper_preset
+    from processor.video_processor import decode_audio, SAMPLE_RATE
+    from processor.speech_to_text import unload_whisper_model
+
+    # Single-stream only; VAD-split multi-process transcription is measured by bench_parallel_stt.py
+    os.environ["ANTIGRAVITY_STT_WORKERS"] = "1"
+    audio = decode_audio(media_path)
+    duration = len(audio) / SAMPLE_RATE
+
+    reference = None
+    if reference_path:
+        with open(reference_path, "r", encoding="utf-8") as f:
+            reference = f.read()
+
+    results = {}
+    for name in presets:
+        set_whisper_preset(name)
+        _transcribe(audio[:5 * SAMPLE_RATE])
+        results[name] = _transcribe(audio)
+        unload_whisper_model()
+
+    if reference is None:
+        if "accurate" not in results:
+            set_whisper_preset("accurate")
+            results["accurate"] = _transcribe(audio)
+            unload_whisper_model()
+        reference = results["accurate"][1]
+        print("\n(no reference transcript given: WER is relative to the 'accurate' preset)")
+
+    print(f"\n{duration:.1f}s of audio, {os.cpu_count()} cores\n")
+    print(f"{'preset':<10} {'model':<8} {'beam':>4} {'batch':>5} {'wall':>8} {'RTF':>7} {'WER':>7}  lang")
+    for name in presets:
+        elapsed, text, language = results[name]
+        set_whisper_preset(name)
+        preset = get_whisper_preset()
+        print(f"{name:<10} {preset['model']:<8} {preset['beam_size']:>4} {preset['batch_size']:>5} "
+              f"{elapsed:7.2f}s {elapsed / duration:7.3f} {word_error_rate(reference, text):7.1%}  {language}")
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+    media = args.pop(0)
+    reference_file = args.pop(0) if args and args[0].endswith(".txt") else None
+    bench_whisper_presets(media, reference_file, args or ("default", "fast", "balanced", "accurate"))
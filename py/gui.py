@@ -6,6 +6,7 @@ import os
 import csv
 import re
 import io
+import threading
 from processor.tracker_cloud import track
 
 def format_seconds_to_min_sec(seconds):
@@ -37,8 +38,11 @@ class StreamRedirector:
     def isatty(self):
         return False
 
+INDIAN_LANGS = ['hi', 'mr', 'ta', 'te', 'kn', 'ml', 'bn', 'gu', 'pa', 'as', 'or']
+
 class AnalysisWorker(QThread):
     finished = Signal(list, dict) # segments, global_stats
+    segment_ready = Signal(dict) # emitted as soon as a segment has been transcribed, translated and tagged
     error = Signal(str)
     status = Signal(str)
     log = Signal(str)
@@ -47,6 +51,9 @@ class AnalysisWorker(QThread):
     def __init__(self, video_path):
         super().__init__()
         self.video_path = video_path
+        self.language = None
+        self.is_indian = False
+        self.total_duration = 0.0
 
     def run(self):
 
@@ -57,93 +64,71 @@ class AnalysisWorker(QThread):
         sys.stderr = redirector
 
         try:
-            from processor.video_processor import extract_audio
-            from processor.speech_to_text import transcribe_audio_with_timestamps
-            from processor.nlp_engine import get_entities_and_nouns
-            from processor.translation_engine import translate_text
-
-            self.status.emit("Extracting audio & detecting language...")
-            audio_path = extract_audio(self.video_path)
-
-            self.status.emit("Transcribing speech...")
-            print(f"[DEBUG] GUI Worker: calling transcribe_audio_with_timestamps...")
-            segments, language = transcribe_audio_with_timestamps(audio_path, video_path=self.video_path)
-            print(f"[DEBUG] GUI Worker: Transcription complete. Detected: {language}")
+            from processor.video_processor import decode_audio, get_audio_duration
+            from processor.speech_to_text import stream_transcribe_audio
+            from processor.analysis_pipeline import run_pipeline
+            from processor.config import get_ner_batch_size
+            from processor import analysis_cache
+
+            # Every stage is cached by video content hash + model config, so
+            # reopening a known video only recomputes what actually changed
+            self.status.emit("Checking analysis cache...")
+            video_hash = analysis_cache.hash_video_file(self.video_path)
+
+            cached_transcript = analysis_cache.load_stage(video_hash, "transcript")
+            cached_translations = analysis_cache.load_stage(video_hash, "translations")
+            cached_entities = analysis_cache.load_stage(video_hash, "entities")
+
+            if cached_transcript is not None:
+                language = cached_transcript["language"]
+                source = iter(cached_transcript["segments"])
+                self.total_duration = max((seg['end'] for seg in cached_transcript["segments"]), default=0.0)
+            else:
+                self.status.emit("Extracting audio & detecting language...")
+                # Decoded straight into memory; no WAV is written
+                audio = analysis_cache.load_audio(video_hash)
+                if audio is None:
+                    audio = analysis_cache.save_audio(video_hash, decode_audio(self.video_path))
+                self.total_duration = get_audio_duration(audio)
+
+                print(f"[DEBUG] GUI Worker: calling stream_transcribe_audio...")
+                source, language = stream_transcribe_audio(audio)
+            print(f"[DEBUG] GUI Worker: Detected language: {language}")
             self.detected_language = language
-
-            INDIAN_LANGS = ['hi', 'mr', 'ta', 'te', 'kn', 'ml', 'bn', 'gu', 'pa', 'as', 'or']
-            is_indian = language in INDIAN_LANGS
-
-            # Batch Translate Segment Texts (to avoid rate limits)
-            texts_to_translate = [seg['text'] for seg in segments]
-            translated_all = []
-            
-            if is_indian and texts_to_translate:
-                # We do it in chunks of 5 sentences to keep text lengths manageable but reduce calls by 5x
-                chunk_size = 5
-                for i in range(0, len(texts_to_translate), chunk_size):
-                    batch = texts_to_translate[i : i+chunk_size]
-                    joined = " ###SEP### ".join(batch)
-                    translated_batch_raw = translate_text(joined, language, "en")
-                    translated_batch = translated_batch_raw.split(" ###SEP### ")
-                    # Pad if split failed to return enough parts
-                    while len(translated_batch) < len(batch):
-                        translated_batch.append(batch[len(translated_batch)])
-                    translated_all.extend(translated_batch)
+            self.language = language
+            self.is_indian = language in INDIAN_LANGS
+
+            # STT, translation and NER run concurrently, connected by bounded queues,
+            # so early segments are tagged while Whisper is still decoding later audio
+            stages = []
+            if cached_translations is not None:
+                stages.append((lambda batch: self._apply_translations(batch, cached_translations), 64))
             else:
-                translated_all = texts_to_translate
-
-            total_segs = len(segments)
-            for i, seg in enumerate(segments):
-                self.progress.emit(int((i / max(1, total_segs)) * 100))
-                
-                original_text = seg['text']
-                translated_text = translated_all[i] if i < len(translated_all) else original_text
-                
-                if is_indian and translated_text != original_text:
-                    seg['translated_text'] = translated_text
-                    raw_entities = get_entities_and_nouns(translated_text)
-                    
-                    # Batch translate entities for this segment
-                    if raw_entities:
-                        ent_names = [e['text'] for e in raw_entities]
-                        joined_ents = " ||| ".join(ent_names)
-                        local_names_raw = translate_text(joined_ents, "en", language)
-                        local_names = local_names_raw.split(" ||| ")
-                        
-                        dual_entities = []
-                        for j, ent in enumerate(raw_entities):
-                            l_name = local_names[j].strip() if j < len(local_names) else ent['text']
-                            
-                            # Add EN entity
-                            dual_entities.append({
-                                "text": ent['text'],
-                                "display_text": f"[EN] {ent['text']}",
-                                "language": "en",
-                                "label": ent['label']
-                            })
-                            
-                            # Add Local entity if different
-                            if l_name != ent['text']:
-                                dual_entities.append({
-                                    "text": l_name,
-                                    "display_text": f"[{language.upper()}] {l_name}",
-                                    "language": language,
-                                    "label": ent['label']
-                                })
-                        seg['entities'] = dual_entities
-                    else:
-                        seg['entities'] = []
-                else:
-                    # Non-indian or translation failed: just English
-                    raw_entities = get_entities_and_nouns(original_text)
-                    seg['entities'] = [{
-                        "text": e['text'],
-                        "display_text": f"[EN] {e['text']}" if is_indian else e['text'],
-                        "language": language if not is_indian else "en",
-                        "label": e['label']
-                    } for e in raw_entities]
+                # We translate 5 sentences per call to keep text lengths manageable but reduce calls by 5x
+                stages.append((self._translate_batch, 5))
 
+            if cached_entities is not None:
+                stages.append((lambda batch: self._apply_entities(batch, cached_entities), 64))
+            else:
+                stages.append((self._tag_batch, get_ner_batch_size()))
+
+            self.status.emit("Transcribing, translating & detecting entities...")
+            items = run_pipeline(enumerate(source), stages, on_item=self._on_segment_ready)
+            segments = [seg for _, seg in items]
+            print(f"[DEBUG] GUI Worker: Pipeline complete. {len(segments)} segments")
+
+            if cached_transcript is None and segments:
+                analysis_cache.save_stage(video_hash, "transcript", {
+                    "segments": [{"start": seg['start'], "end": seg['end'], "text": seg['text']} for seg in segments],
+                    "language": language,
+                    "duration": self.total_duration
+                })
+            if cached_translations is None:
+                analysis_cache.save_stage(video_hash, "translations", [seg.get('translated_text', seg['text']) for seg in segments])
+            if cached_entities is None:
+                analysis_cache.save_stage(video_hash, "entities", [seg['entities'] for seg in segments])
+
+            for seg in segments:
                 seg['selected_wiki'] = None
                 seg['selected_wiki_url'] = None
                 seg['y_offset'] = 0
@@ -154,9 +139,12 @@ class AnalysisWorker(QThread):
             # --- FEATURE: GLOBAL ENTITY INTELLIGENCE ---
             from processor.nlp_engine import build_global_entity_stats, compute_global_scores, get_sliding_context, rank_entities_for_segment
 
-            self.status.emit("Building global entity intelligence...")
-            global_stats = build_global_entity_stats(segments)
-            global_stats = compute_global_scores(global_stats)
+            global_stats = analysis_cache.load_stage(video_hash, "global_stats")
+            if global_stats is None:
+                self.status.emit("Building global entity intelligence...")
+                global_stats = build_global_entity_stats(segments)
+                global_stats = compute_global_scores(global_stats)
+                analysis_cache.save_stage(video_hash, "global_stats", global_stats)
 
             self.status.emit("Ranking entities with context...")
             for i, seg in enumerate(segments):
@@ -182,6 +170,87 @@ class AnalysisWorker(QThread):
             sys.stdout = old_stdout
             sys.stderr = old_stderr
 
+    def _on_segment_ready(self, item):
+        i, seg = item
+        if self.total_duration > 0:
+            self.progress.emit(min(99, int((seg['end'] / self.total_duration) * 100)))
+        self.segment_ready.emit(seg)
+
+    def _translate_batch(self, batch):
+        from processor.translation_engine import translate_text
+
+        if not self.is_indian:
+            return
+
+        texts = [seg['text'] for _, seg in batch]
+        joined = " ###SEP### ".join(texts)
+        translated_batch = translate_text(joined, self.language, "en").split(" ###SEP### ")
+        # Pad if split failed to return enough parts
+        while len(translated_batch) < len(texts):
+            translated_batch.append(texts[len(translated_batch)])
+
+        for (_, seg), translated_text in zip(batch, translated_batch):
+            if translated_text != seg['text']:
+                seg['translated_text'] = translated_text
+
+    def _apply_translations(self, batch, translated_all):
+        for i, seg in batch:
+            translated_text = translated_all[i] if i < len(translated_all) else seg['text']
+            if self.is_indian and translated_text != seg['text']:
+                seg['translated_text'] = translated_text
+
+    def _tag_batch(self, batch):
+        from processor.nlp_engine import get_entities_and_nouns_batch
+        from processor.translation_engine import translate_text
+
+        language = self.language
+        all_entities = get_entities_and_nouns_batch([seg.get('translated_text', seg['text']) for _, seg in batch])
+
+        for (_, seg), raw_entities in zip(batch, all_entities):
+            if 'translated_text' in seg:
+                # Batch translate entities for this segment
+                if raw_entities:
+                    ent_names = [e['text'] for e in raw_entities]
+                    joined_ents = " ||| ".join(ent_names)
+                    local_names_raw = translate_text(joined_ents, "en", language)
+                    local_names = local_names_raw.split(" ||| ")
+                    
+                    dual_entities = []
+                    for j, ent in enumerate(raw_entities):
+                        l_name = local_names[j].strip() if j < len(local_names) else ent['text']
+                        
+                        # Add EN entity
+                        dual_entities.append({
+                            "text": ent['text'],
+                            "display_text": f"[EN] {ent['text']}",
+                            "language": "en",
+                            "label": ent['label']
+                        })
+                        
+                        # Add Local entity if different
+                        if l_name != ent['text']:
+                            dual_entities.append({
+                                "text": l_name,
+                                "display_text": f"[{language.upper()}] {l_name}",
+                                "language": language,
+                                "label": ent['label']
+                            })
+                    seg['entities'] = dual_entities
+                else:
+                    seg['entities'] = []
+            else:
+                # Non-indian or translation failed: just English
+                seg['entities'] = [{
+                    "text": e['text'],
+                    "display_text": f"[EN] {e['text']}" if self.is_indian else e['text'],
+                    "language": language if not self.is_indian else "en",
+                    "label": e['label']
+                } for e in raw_entities]
+
+    def _apply_entities(self, batch, all_seg_entities):
+        for i, seg in batch:
+            seg['entities'] = all_seg_entities[i] if i < len(all_seg_entities) else []
+
 class SearchWorker(QThread):
     finished = Signal(list)
     error = Signal(str)
@@ -213,11 +282,18 @@ class RenderWorker(QThread):
     finished = Signal(str)
     error = Signal(str)
     status = Signal(str)
+    progress = Signal(dict) # frames, fps, speed, percent, eta, ... from RenderProgress
+    cancelled = Signal()
 
     def __init__(self, video_path, render_plan):
         super().__init__()
         self.video_path = video_path
         self.render_plan = render_plan
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        # Picked up by the ffmpeg watcher within ~0.2s; the processes are stopped and the partial output removed
+        self._cancel_event.set()
 
     def run(self):
         try:
@@ -229,7 +305,16 @@ class RenderWorker(QThread):
             unload_search_model()
 
             from processor.overlay_engine import render_with_screenshots
-            output = render_with_screenshots(self.video_path, self.render_plan)
+            from processor.ffmpeg_progress import FFmpegCancelled
+            try:
+                output = render_with_screenshots(
+                    self.video_path, self.render_plan,
+                    on_progress=self.progress.emit,
+                    cancel_event=self._cancel_event
+                )
+            except FFmpegCancelled:
+                self.cancelled.emit()
+                return
             self.finished.emit(output)
         except Exception as e:
             self.error.emit(str(e))
@@ -325,6 +410,13 @@ class EditorApp(QMainWindow):
         """)
         loading_layout.addWidget(self.progress_bar)
 
+        # Only shown while a render is running
+        self.btn_cancel_render = QPushButton("CANCEL RENDER")
+        self.btn_cancel_render.setFixedSize(200, 40)
+        self.btn_cancel_render.clicked.connect(self.cancel_render)
+        self.btn_cancel_render.hide()
+        loading_layout.addWidget(self.btn_cancel_render, 0, Qt.AlignCenter)
+
         self.log_console = QPlainTextEdit()
         self.log_console.setReadOnly(True)
         self.log_console.setStyleSheet("""
@@ -339,6 +431,11 @@ class EditorApp(QMainWindow):
         self.log_console.setMinimumHeight(250)
         loading_layout.addWidget(self.log_console)
 
+        # Segments show up here as soon as the pipeline has tagged them
+        self.live_seg_list = QListWidget()
+        self.live_seg_list.setMinimumHeight(150)
+        loading_layout.addWidget(self.live_seg_list)
+
         loading_layout.addStretch(1)
         self.stack.addWidget(self.loading_page)
 
@@ -397,6 +494,7 @@ class EditorApp(QMainWindow):
         self.y_offset_input.setSingleStep(100)
         self.y_offset_input.setPrefix("V-Offset: ")
         self.y_offset_input.setStyleSheet("background-color: #3c3c3c; height: 30px;")
+        self.y_offset_input.valueChanged.connect(self.on_offset_changed)
         
         self.btn_refresh_scroll = QPushButton("REFRESH VIEW")
         self.btn_refresh_scroll.clicked.connect(self.on_refresh_with_scroll)
@@ -437,12 +535,14 @@ class EditorApp(QMainWindow):
             self.stack.setCurrentIndex(2)
             self.progress_bar.setValue(0)
             self.log_console.clear()
+            self.live_seg_list.clear()
             self.load_status.setText("Initializing...")
 
             self.worker = AnalysisWorker(file_path)
             self.worker.status.connect(self.load_status.setText)
             self.worker.log.connect(self.append_log)
             self.worker.progress.connect(self.progress_bar.setValue)
+            self.worker.segment_ready.connect(self.on_segment_ready)
             self.worker.finished.connect(self.on_analysis_complete)
             self.worker.error.connect(self.on_error)
             self.worker.start()
@@ -453,6 +553,12 @@ class EditorApp(QMainWindow):
 
         self.log_console.verticalScrollBar().setValue(self.log_console.verticalScrollBar().maximum())
 
+    def on_segment_ready(self, seg):
+        start_fmt = format_seconds_to_min_sec(seg['start'])
+        ent_count = len(seg.get('entities', []))
+        self.live_seg_list.addItem(f"[{start_fmt}] {seg['text'][:60]} ({ent_count} entities)")
+        self.live_seg_list.scrollToBottom()
+
     def on_analysis_complete(self, segments, global_stats):
         self.segments = segments
         self.global_stats = global_stats # Store global stats for later search boosting
@@ -608,6 +714,21 @@ class EditorApp(QMainWindow):
         if url:
             self.capture_and_preview(url, seg.get('selected_wiki', 'Current Page'))
 
+    def on_offset_changed(self, y_offset):
+        # Re-crop the already captured page locally; no reload, so the preview follows the spinbox live
+        if self.current_seg_index == -1: return
+        seg = self.segments[self.current_seg_index]
+        url = seg.get('selected_wiki_url')
+        if not url or not seg.get('screenshot_path'):
+            return
+
+        from processor.screenshot_engine import crop_cached_screenshot
+        path = crop_cached_screenshot(url, f"seg_{self.current_seg_index}", y_offset=y_offset)
+        if path:
+            seg['y_offset'] = y_offset
+            seg['screenshot_path'] = path
+            self.update_preview(path)
+
     def update_preview(self, path):
         pixmap = QPixmap(path)
         if not pixmap.isNull():
@@ -623,14 +744,41 @@ class EditorApp(QMainWindow):
             return
 
         self.stack.setCurrentIndex(2)
+        self.live_seg_list.clear()
         self.load_status.setText("RENDERING INTELLIGENCE LAYER...\nPlease wait, encoding video.")
+        self.progress_bar.setValue(0)
+        self.btn_cancel_render.setEnabled(True)
+        self.btn_cancel_render.show()
 
         self.render_worker = RenderWorker(self.video_path, render_plan)
+        self.render_worker.progress.connect(self.on_render_progress)
         self.render_worker.finished.connect(self.on_render_finished)
+        self.render_worker.cancelled.connect(self.on_render_cancelled)
         self.render_worker.error.connect(self.on_error)
+        self.render_worker.finished.connect(self.btn_cancel_render.hide)
+        self.render_worker.cancelled.connect(self.btn_cancel_render.hide)
+        self.render_worker.error.connect(self.btn_cancel_render.hide)
         self.render_worker.start()
         track("render_started", {"overlays_count": len(render_plan)})
 
+    def on_render_progress(self, report):
+        self.progress_bar.setValue(int(report['percent']))
+        eta = format_seconds_to_min_sec(report['eta']) if report['eta'] is not None else "--:--"
+        self.load_status.setText(
+            "RENDERING INTELLIGENCE LAYER...\n"
+            f"{report['frames']} frames | {report['fps']:.0f} fps | {report['speed']:.2f}x | ETA {eta}"
+        )
+
+    def cancel_render(self):
+        if getattr(self, "render_worker", None) and self.render_worker.isRunning():
+            self.btn_cancel_render.setEnabled(False)
+            self.load_status.setText("CANCELLING RENDER...")
+            self.render_worker.cancel()
+
+    def on_render_cancelled(self):
+        self.stack.setCurrentIndex(3)
+        track("render_cancelled", {})
+
     def on_render_finished(self, output):
         csv_path = output.rsplit(".", 1)[0] + "_knowledge_links.csv"
         try:
@@ -1,5 +1,6 @@
 import sys
 import types
+import multiprocessing
 import av
 
 if not hasattr(av, 'subtitles'):
@@ -16,15 +17,22 @@ if not hasattr(av, 'subtitles'):
     sub_mod.stream = stream_mod
     sys.modules["av.subtitles.stream"] = stream_mod
 
-from gui import EditorApp
-from processor.tracker_cloud import ph
-from PySide6.QtWidgets import QApplication
-app = QApplication(sys.argv)
+# Spawned worker processes (parallel Whisper) re-import this module, so the
+# window is only created in the main process
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
 
-window = EditorApp()
-window.show()
+    from gui import EditorApp
+    from processor.tracker_cloud import ph
+    from PySide6.QtWidgets import QApplication
+    app = QApplication(sys.argv)
 
-exit_code = app.exec()
-if ph:
-    ph.shutdown()
-sys.exit(exit_code)
+    window = EditorApp()
+    window.show()
+
+    exit_code = app.exec()
+    from processor.screenshot_engine import shutdown_browser_service
+    shutdown_browser_service()
+    if ph:
+        ph.shutdown()
+    sys.exit(exit_code)
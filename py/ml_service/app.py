@@ -16,46 +16,135 @@ if not hasattr(av, 'subtitles'):
     sub_mod.stream = stream_mod
     sys.modules["av.subtitles.stream"] = stream_mod
 
-from fastapi import FastAPI, UploadFile, File
+from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from contextlib import asynccontextmanager
+import asyncio
 import shutil
+import json
+import time
 import os
 
-from processor.video_processor import extract_audio
-from processor.speech_to_text import transcribe_audio_with_timestamps
-from processor.nlp_engine import get_entities_and_nouns
+from processor.video_processor import decode_audio, get_audio_duration
+from processor.speech_to_text import stream_transcribe_audio, load_whisper_model
+from processor.nlp_engine import load_nlp_model
+from processor.analysis_pipeline import run_pipeline
+from processor.config import get_ner_batch_size, get_service_config, get_stt_engine
+from processor.workspace import create_workspace, remove_workspace
+from processor import analysis_cache
+from ml_service.jobs import JobManager, JobCancelled, QueueFullError
+from ml_service.ner_batcher import NERBatcher
 
-app = FastAPI()
+# Per-job workspaces live under temp_service unless ANTIGRAVITY_WORKSPACE_DIR says otherwise
+os.environ.setdefault("ANTIGRAVITY_WORKSPACE_DIR", os.path.abspath(os.path.join("temp_service", "workspaces")))
 
-TEMP_DIR = "temp_service"
-os.makedirs(TEMP_DIR, exist_ok=True)
+
+def warm_up_models():
+    """
+    Loads every model the analysis needs so the first request doesn't pay for it.
+    """
+    start = time.time()
+    load_nlp_model()
+    if get_stt_engine() == "whisper":
+        load_whisper_model()
+    print(f"[Service] Models ready in {time.time() - start:.1f}s (pid {os.getpid()})")
+
+
+@asynccontextmanager
+async def lifespan(app):
+    if get_service_config()["preload"]:
+        await run_in_threadpool(warm_up_models)
+    yield
+    job_manager.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+_service_config = get_service_config()
+
+# Shared by all jobs so concurrent analyses feed the model one larger batch
+ner_batcher = NERBatcher(
+    max_batch=_service_config["ner_max_batch"],
+    max_wait_ms=_service_config["ner_max_wait_ms"]
+)
+
+
+def _tag_segments(batch):
+    all_entities = ner_batcher.predict([seg["text"] for _, seg in batch])
+    for (_, seg), entities in zip(batch, all_entities):
+        seg["entities"] = entities
+
+
+def _apply_entities(batch, all_entities):
+    for i, seg in batch:
+        seg["entities"] = all_entities[i] if i < len(all_entities) else []
 
 
 @app.get("/")
 def health():
-    return {"status": "ML Service Running"}
+    return {"status": "ML Service Running", "jobs": job_manager.stats(), "ner_batcher": ner_batcher.stats()}
 
 
-@app.post("/analyze_video")
-async def analyze_video(file: UploadFile = File(...)):
+def run_analysis(video_path, cancel_event=None, on_segment=None, on_complete=None):
+    """
+    Full analysis of one video: transcript, entities, global stats and ranking.
+    Runs on a job worker thread; cancel_event is checked between stages.
+    Audio is decoded into memory, so nothing but the upload touches the job's workspace.
+    on_segment(index, segment, language) fires as soon as a segment has its entities,
+    on_complete(language, segments, global_stats) once ranking is done.
+    """
+    video_hash = analysis_cache.hash_video_file(video_path)
 
-    video_path = os.path.join(TEMP_DIR, file.filename)
+    cached_transcript = analysis_cache.load_stage(video_hash, "transcript")
+    if cached_transcript is not None:
+        source = iter(cached_transcript["segments"])
+        language = cached_transcript["language"]
+    else:
+        audio = analysis_cache.load_audio(video_hash)
+        if audio is None:
+            audio = analysis_cache.save_audio(video_hash, decode_audio(video_path))
+            _check_cancelled(cancel_event)
+        source, language = stream_transcribe_audio(audio)
 
-    with open(video_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    # The service tags the raw transcript (no translation), so its entity
+    # stages are cached separately from the GUI's bilingual ones
+    cached_entities = analysis_cache.load_stage(video_hash, "entities", variant="service")
+    if cached_entities is not None:
+        ner_stage = lambda batch: _apply_entities(batch, cached_entities)
+    else:
+        ner_stage = _tag_segments
 
-    audio_path = extract_audio(video_path)
+    # NER runs concurrently with STT instead of waiting for the full transcript
+    on_item = None
+    if on_segment is not None:
+        on_item = lambda item: on_segment(item[0], item[1], language)
+    items = run_pipeline(enumerate(source), [(ner_stage, get_ner_batch_size())], on_item=on_item, cancel_event=cancel_event)
+    segments = [seg for _, seg in items]
 
-    segments, language = transcribe_audio_with_timestamps(audio_path)
+    if cached_transcript is None and segments:
+        analysis_cache.save_stage(video_hash, "transcript", {
+            "segments": [{"start": seg["start"], "end": seg["end"], "text": seg["text"]} for seg in segments],
+            "language": language,
+            "duration": get_audio_duration(audio)
+        })
+    if cached_entities is None:
+        analysis_cache.save_stage(video_hash, "entities", [seg["entities"] for seg in segments], variant="service")
 
     for seg in segments:
-        seg["entities"] = get_entities_and_nouns(seg["text"])
         seg["language"] = language
 
+    _check_cancelled(cancel_event)
+
     # --- NEW PIPELINE STEPS ---
     from processor.nlp_engine import build_global_entity_stats, compute_global_scores, get_sliding_context, rank_entities_for_segment
     
-    global_stats = build_global_entity_stats(segments)
-    global_stats = compute_global_scores(global_stats)
+    global_stats = analysis_cache.load_stage(video_hash, "global_stats", variant="service")
+    if global_stats is None:
+        global_stats = build_global_entity_stats(segments)
+        global_stats = compute_global_scores(global_stats)
+        analysis_cache.save_stage(video_hash, "global_stats", global_stats, variant="service")
 
     for i, seg in enumerate(segments):
         context_text = get_sliding_context(segments, i)
@@ -66,7 +155,175 @@ async def analyze_video(file: UploadFile = File(...)):
         seg['final_entities'] = final_ranked
     # ---------------------------
 
+    if on_complete is not None:
+        on_complete(language, segments, global_stats)
+
     return {
         "language": language,
         "segments": segments
     }
+
+
+def _check_cancelled(cancel_event):
+    if cancel_event is not None and cancel_event.is_set():
+        raise JobCancelled("Job cancelled")
+
+
+def _run_job(job):
+    def on_segment(index, seg, language):
+        job.publish({
+            "type": "segment",
+            "index": index,
+            "segment": {
+                "start": seg["start"],
+                "end": seg["end"],
+                "text": seg["text"],
+                "entities": seg["entities"],
+                "language": language
+            }
+        })
+
+    def on_complete(language, segments, global_stats):
+        job.publish({
+            "type": "final",
+            "language": language,
+            "global_stats": global_stats,
+            "final_entities": [seg["final_entities"] for seg in segments],
+            "metrics": {
+                "time_to_first_segment": job.time_to_first_segment,
+                "total_time": time.time() - job.created_at
+            }
+        })
+
+    return run_analysis(
+        job.video_path,
+        cancel_event=job.cancel_event,
+        on_segment=on_segment,
+        on_complete=on_complete
+    )
+
+
+job_manager = JobManager(
+    _run_job,
+    max_workers=_service_config["workers"],
+    max_queue=_service_config["max_queue"],
+    shared_dir=_service_config["shared_dir"]
+)
+
+
+def _copy_upload(src, video_path):
+    with open(video_path, "wb") as buffer:
+        shutil.copyfileobj(src, buffer)
+
+
+async def _save_upload(file, workspace):
+    filename = os.path.basename(file.filename or "upload")
+    video_path = os.path.join(workspace, filename)
+    await run_in_threadpool(_copy_upload, file.file, video_path)
+    return filename, video_path
+
+
+async def _submit_upload(file):
+    # Each job gets its own workspace for the upload and everything derived from it;
+    # the job manager removes it when the job finishes, fails or is cancelled
+    workspace = create_workspace("service")
+    try:
+        filename, video_path = await _save_upload(file, workspace)
+        return job_manager.submit(filename, video_path, workspace=workspace)
+    except QueueFullError as e:
+        remove_workspace(workspace)
+        raise HTTPException(status_code=429, detail=f"Analysis queue is full ({e})")
+    except Exception:
+        remove_workspace(workspace)
+        raise
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(file: UploadFile = File(...)):
+    job = await _submit_upload(file)
+    return job.to_dict()
+
+
+@app.get("/jobs")
+def list_jobs():
+    return {"jobs": job_manager.list()}
+
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job.to_dict()
+
+
+@app.get("/jobs/{job_id}/result")
+def job_result(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=job.error)
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    return job.result
+
+
+@app.delete("/jobs/{job_id}")
+def cancel_job(job_id: str):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job.to_dict()
+
+
+async def _stream_job_events(job):
+    # NDJSON: one "segment" line per segment as it is tagged, then a "final"
+    # line (or "error"/"cancelled") once the job is over
+    index = 0
+    while True:
+        events = job.events_since(index)
+        for event in events:
+            yield json.dumps(event, ensure_ascii=False) + "\n"
+        index += len(events)
+        if job.finished_at is not None and not job.events_since(index):
+            break
+        await asyncio.sleep(0.1)
+
+
+@app.get("/jobs/{job_id}/stream")
+def stream_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return StreamingResponse(_stream_job_events(job), media_type="application/x-ndjson")
+
+
+@app.post("/analyze_video/stream")
+async def analyze_video_stream(file: UploadFile = File(...)):
+    job = await _submit_upload(file)
+    return StreamingResponse(
+        _stream_job_events(job),
+        media_type="application/x-ndjson",
+        headers={"X-Job-Id": job.id}
+    )
+
+
+@app.post("/analyze_video")
+async def analyze_video(file: UploadFile = File(...)):
+    # Same response as before, but the analysis runs on the job pool and this
+    # coroutine only awaits it, so the event loop stays free for other requests
+    job = await _submit_upload(file)
+    try:
+        result = await asyncio.wrap_future(job.future)
+    except asyncio.CancelledError:
+        # A cancelled job surfaces as asyncio's CancelledError (a BaseException);
+        # anything else is this request itself being cancelled, so let it through
+        if not job.future.cancelled():
+            raise
+        raise HTTPException(status_code=409, detail="Job cancelled")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if job.status == "cancelled":
+        raise HTTPException(status_code=409, detail="Job cancelled")
+    return result
@@ -0,0 +1,339 @@
+import os
+import json
+import time
+import uuid
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from processor.analysis_pipeline import PipelineCancelled
+from processor.workspace import remove_workspace
+
+# Files a job leaves in shared_dir: snapshot (with the result), event log, cancel marker
+SHARED_FILE_EXTENSIONS = (".json", ".ndjson", ".cancel")
+
+
+def sweep_shared_dir(shared_dir):
+    """
+    Removes every job file from shared_dir. Only safe while no worker is using it:
+    the launcher calls it once, before it forks the workers.
+    """
+    if not os.path.isdir(shared_dir):
+        return
+    removed = 0
+    for name in os.listdir(shared_dir):
+        # Snapshots, event logs, cancel markers and half-written snapshots
+        if name.endswith(SHARED_FILE_EXTENSIONS) or name.endswith(".tmp"):
+            try:
+                os.remove(os.path.join(shared_dir, name))
+                removed += 1
+            except OSError:
+                pass
+    if removed:
+        print(f"[Jobs] Removed {removed} stale job files from {shared_dir}")
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, job_id, filename, video_path, workspace=None, events_path=None):
+        self.id = job_id
+        self.filename = filename
+        self.video_path = video_path
+        self.workspace = workspace # removed once the job is over, however it ends
+        self.status = "queued"
+        self.error = None
+        self.result = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.first_segment_at = None
+        self.cancel_event = threading.Event()
+        self.future = None
+        self._events = []
+        self._events_lock = threading.Lock()
+        self._events_path = events_path
+
+    @property
+    def time_to_first_segment(self):
+        if self.first_segment_at is None:
+            return None
+        return self.first_segment_at - self.created_at
+
+    def publish(self, event):
+        """
+        Appends an event for streaming clients. Events are kept for the life of
+        the job so a client that connects late still gets the full sequence.
+        """
+        with self._events_lock:
+            if event.get("type") == "segment" and self.first_segment_at is None:
+                self.first_segment_at = time.time()
+            self._events.append(event)
+            if self._events_path:
+                with open(self._events_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+    def events_since(self, index):
+        with self._events_lock:
+            return self._events[index:]
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "time_to_first_segment": self.time_to_first_segment
+        }
+
+
+class SharedJobView:
+    """
+    Read-only view of a job owned by another worker process (multi-worker mode).
+    Mirrors the Job attributes the endpoints use, re-reading the shared files on access.
+    """
+
+    def __init__(self, snapshot_path, events_path):
+        self._snapshot_path = snapshot_path
+        self._events_path = events_path
+
+    def _snapshot(self):
+        try:
+            with open(self._snapshot_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @property
+    def id(self):
+        return self._snapshot().get("job_id")
+
+    @property
+    def status(self):
+        return self._snapshot().get("status")
+
+    @property
+    def error(self):
+        return self._snapshot().get("error")
+
+    @property
+    def result(self):
+        return self._snapshot().get("result")
+
+    @property
+    def finished_at(self):
+        return self._snapshot().get("finished_at")
+
+    def events_since(self, index):
+        try:
+            with open(self._events_path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            return []
+        # Skip a trailing line that is still being written
+        complete = [line for line in lines if line.endswith("\n")]
+        return [json.loads(line) for line in complete[index:]]
+
+    def to_dict(self):
+        snapshot = self._snapshot()
+        snapshot.pop("result", None)
+        return snapshot
+
+
+class JobManager:
+    """
+    Runs analyses on a bounded worker pool so the event loop never blocks.
+
+    At most max_workers analyses run at once and at most max_queue more wait;
+    submitting beyond that raises QueueFullError. Queued jobs are cancelled
+    immediately, running ones stop at the next pipeline checkpoint.
+    Finished jobs are kept (up to keep_finished) so results can be fetched.
+    """
+
+    def __init__(self, run_fn, max_workers=2, max_queue=16, keep_finished=200, shared_dir=None):
+        self.run_fn = run_fn
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.keep_finished = keep_finished
+        self.shared_dir = shared_dir
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._ttfs = deque(maxlen=200) # recent time-to-first-segment values (seconds)
+        self._watcher = None
+
+        if shared_dir:
+            # With several worker processes a client may poll/cancel through any of them,
+            # so job state is mirrored to shared_dir and cancel requests arrive as marker files
+            os.makedirs(shared_dir, exist_ok=True)
+
+    def submit(self, filename, video_path, workspace=None):
+        with self._lock:
+            active = sum(1 for job in self._jobs.values() if job.status in ("queued", "running"))
+            if active >= self.max_workers + self.max_queue:
+                raise QueueFullError(f"{active} jobs already running or waiting")
+
+            job_id = uuid.uuid4().hex
+            job = Job(job_id, filename, video_path, workspace=workspace, events_path=self._shared_path(job_id, ".ndjson"))
+            self._jobs[job.id] = job
+            self._persist(job)
+            job.future = self._pool.submit(self._run, job)
+            self._prune()
+            self._ensure_cancel_watcher()
+        return job
+
+    def get(self, job_id):
+        """
+        Returns the local Job, or a SharedJobView if another worker process owns it.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None or not self.shared_dir:
+            return job
+        snapshot_path = self._shared_path(job_id, ".json")
+        if snapshot_path and os.path.exists(snapshot_path):
+            return SharedJobView(snapshot_path, self._shared_path(job_id, ".ndjson"))
+        return None
+
+    def list(self):
+        with self._lock:
+            return [job.to_dict() for job in self._jobs.values()]
+
+    def cancel(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.status in ("queued", "running"):
+                job.cancel_event.set()
+                if job.future.cancel():
+                    self._finish(job, "cancelled")
+        if job is None and self.shared_dir:
+            # Owned by another worker process: leave a marker for its watcher
+            job = self.get(job_id)
+            if job is not None and job.status in ("queued", "running"):
+                open(self._shared_path(job_id, ".cancel"), "w").close()
+        return job
+
+    def stats(self):
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            ttfs = sorted(self._ttfs)
+        metrics = {}
+        if ttfs:
+            metrics["time_to_first_segment_p50"] = ttfs[len(ttfs) // 2]
+            metrics["time_to_first_segment_p95"] = ttfs[min(len(ttfs) - 1, int(len(ttfs) * 0.95))]
+        return {"workers": self.max_workers, "max_queue": self.max_queue, "jobs": counts, "metrics": metrics}
+
+    def shutdown(self):
+        with self._lock:
+            for job in self._jobs.values():
+                job.cancel_event.set()
+                # Queued jobs never reach _run: finish them here so their workspace
+                # is removed and their shared status doesn't stay "queued"
+                if job.status == "queued" and job.future.cancel():
+                    self._finish(job, "cancelled")
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job):
+        with self._lock:
+            if job.cancel_event.is_set():
+                self._finish(job, "cancelled")
+                return None
+            job.status = "running"
+            job.started_at = time.time()
+            self._persist(job)
+
+        try:
+            result = self.run_fn(job)
+        except (JobCancelled, PipelineCancelled):
+            with self._lock:
+                self._finish(job, "cancelled")
+            return None
+        except Exception as e:
+            print(f"[Jobs] Job {job.id} failed: {e}")
+            with self._lock:
+                job.error = str(e)
+                self._finish(job, "failed")
+            raise
+
+        with self._lock:
+            job.result = result
+            self._finish(job, "done")
+        return result
+
+    def _finish(self, job, status):
+        if status == "failed":
+            job.publish({"type": "error", "detail": job.error})
+        elif status == "cancelled":
+            job.publish({"type": "cancelled"})
+        if job.time_to_first_segment is not None:
+            self._ttfs.append(job.time_to_first_segment)
+        job.status = status
+        job.finished_at = time.time()
+        self._persist(job)
+        remove_workspace(job.workspace)
+
+    def _shared_path(self, job_id, ext):
+        if not self.shared_dir:
+            return None
+        return os.path.join(self.shared_dir, job_id + ext)
+
+    def _persist(self, job):
+        path = self._shared_path(job.id, ".json")
+        if not path:
+            return
+        snapshot = job.to_dict()
+        if job.status == "done":
+            snapshot["result"] = job.result
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[Jobs] Could not persist job {job.id}: {e}")
+
+    def _ensure_cancel_watcher(self):
+        if not self.shared_dir or self._watcher is not None:
+            return
+        self._watcher = threading.Thread(target=self._watch_cancel_markers, name="job-cancel-watcher", daemon=True)
+        self._watcher.start()
+
+    def _watch_cancel_markers(self):
+        while True:
+            time.sleep(0.5)
+            with self._lock:
+                active = [job.id for job in self._jobs.values() if job.status in ("queued", "running")]
+            for job_id in active:
+                marker = self._shared_path(job_id, ".cancel")
+                if os.path.exists(marker):
+                    os.remove(marker)
+                    self.cancel(job_id)
+
+    def _prune(self):
+        finished = [job for job in self._jobs.values() if job.finished_at is not None]
+        if len(finished) <= self.keep_finished:
+            return
+        finished.sort(key=lambda job: job.finished_at)
+        for job in finished[:len(finished) - self.keep_finished]:
+            del self._jobs[job.id]
+            self._remove_shared_files(job.id)
+
+    def _remove_shared_files(self, job_id):
+        for ext in SHARED_FILE_EXTENSIONS:
+            path = self._shared_path(job_id, ext)
+            if path and os.path.exists(path):
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    print(f"[Jobs] Could not remove {path}: {e}")
@@ -0,0 +1,109 @@
+import time
+import queue
+import threading
+from concurrent.futures import Future
+
+from processor.nlp_engine import get_entities_and_nouns_batch
+
+
+class NERBatcher:
+    """
+    Micro-batching scheduler in front of the GLiNER model.
+
+    Jobs call predict(texts) from their own threads. A single scheduler thread
+    takes the oldest waiting request, then keeps adding requests from other jobs
+    until the batch holds max_batch texts or max_wait_ms has passed since the
+    first one, runs them as one model call and hands each job its own slice.
+    While the model is busy new requests pile up, so under load batches fill
+    without waiting; a lone job only pays max_wait_ms once per call.
+    """
+
+    def __init__(self, predict_fn=get_entities_and_nouns_batch, max_batch=32, max_wait_ms=10):
+        self.predict_fn = predict_fn
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms / 1000)
+        self._queue = queue.Queue()
+        self._pending = None # request taken off the queue that didn't fit the last batch
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._texts = 0
+
+    def predict(self, texts):
+        """
+        Returns one entity list per text, in order. Blocks until the batch holding them has run.
+        """
+        if not texts:
+            return []
+        return self.submit(texts).result()
+
+    def submit(self, texts):
+        self._ensure_started()
+        future = Future()
+        self._queue.put((list(texts), future))
+        return future
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "batches": self._batches,
+                "texts": self._texts,
+                "avg_batch": self._texts / self._batches if self._batches else 0.0,
+                "waiting": self._queue.qsize()
+            }
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="ner-batcher", daemon=True)
+                self._thread.start()
+
+    def _next_request(self, timeout=None):
+        if self._pending is not None:
+            request, self._pending = self._pending, None
+            return request
+        return self._queue.get(timeout=timeout) if timeout is not None else self._queue.get()
+
+    def _collect(self):
+        requests = [self._next_request()]
+        size = len(requests[0][0])
+        deadline = time.monotonic() + self.max_wait
+
+        while size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                request = self._next_request(timeout=max(0.0, remaining)) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if size + len(request[0]) > self.max_batch:
+                # Requests aren't split; this one leads the next batch
+                self._pending = request
+                break
+            requests.append(request)
+            size += len(request[0])
+        return requests
+
+    def _loop(self):
+        while True:
+            requests = self._collect()
+            requests = [(texts, future) for texts, future in requests if future.set_running_or_notify_cancel()]
+            if not requests:
+                continue
+
+            all_texts = [text for texts, _ in requests for text in texts]
+            try:
+                all_entities = self.predict_fn(all_texts, batch_size=self.max_batch)
+            except Exception as e:
+                for _, future in requests:
+                    future.set_exception(e)
+                continue
+
+            with self._stats_lock:
+                self._batches += 1
+                self._texts += len(all_texts)
+
+            offset = 0
+            for texts, future in requests:
+                future.set_result(all_entities[offset:offset + len(texts)])
+                offset += len(texts)
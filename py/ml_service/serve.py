@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Multi-process launcher for the ML service.
+
+The parent process loads the GLiNER weights once, binds the listening socket
+and forks the workers, so every worker shares the weight pages copy-on-write
+instead of holding its own copy. Each worker then runs the app's lifespan
+warm-up (Whisper, tagger data, a first NER prediction) in its own process.
+
+Usage:
+    python -m ml_service.serve --workers 4 --host 0.0.0.0 --port 8000
+"""
+import os
+import gc
+import sys
+import time
+import signal
+import socket
+import argparse
+
+
+def _bind(host, port):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _preload_shared_weights():
+    """
+    Loads model weights in the parent without running inference.
+
+    Inference would start torch/OpenMP thread pools, which are not fork-safe.
+    Whisper is left to the workers for the same reason: CTranslate2 creates its
+    threads when the model is constructed, and they would not exist in the children.
+    """
+    from processor.nlp_engine import _get_gliner_model
+    start = time.time()
+    _get_gliner_model()
+    print(f"[Service] Shared weights loaded in {time.time() - start:.1f}s")
+
+
+def _run_worker(sock, log_level):
+    import uvicorn
+    from ml_service.app import app
+
+    config = uvicorn.Config(app, log_level=log_level)
+    server = uvicorn.Server(config)
+    server.run(sockets=[sock])
+
+
+def _spawn(sock, log_level):
+    pid = os.fork()
+    if pid == 0:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        code = 0
+        try:
+            _run_worker(sock, log_level)
+        except BaseException as e:
+            print(f"[Service] Worker {os.getpid()} crashed: {e}")
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the ML service with forked, model-sharing workers")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--no-preload", action="store_true", help="Don't load shared weights in the parent")
+    args = parser.parse_args()
+
+    # Jobs live in the worker that accepted the upload; the shared dir lets
+    # status/result/stream/cancel requests land on any worker
+    os.environ.setdefault("ANTIGRAVITY_SERVICE_SHARED_DIR", os.path.join("temp_service", "jobs"))
+    # No worker exists yet, so anything in the shared dir was left by a previous run
+    from ml_service.jobs import sweep_shared_dir
+    sweep_shared_dir(os.environ["ANTIGRAVITY_SERVICE_SHARED_DIR"])
+
+    if not args.no_preload:
+        _preload_shared_weights()
+    import ml_service.app  # noqa: F401 -- import once so the children inherit it
+
+    sock = _bind(args.host, args.port)
+
+    # Keep the refcount/GC writes of the cycle collector off the shared pages
+    gc.collect()
+    gc.freeze()
+
+    workers = {}
+    for _ in range(args.workers):
+        pid = _spawn(sock, args.log_level)
+        workers[pid] = time.time()
+    print(f"[Service] Listening on {args.host}:{args.port} with {args.workers} workers: {sorted(workers)}")
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        started = workers.pop(pid, None)
+        if started is None or stopping:
+            continue
+        print(f"[Service] Worker {pid} exited with status {status}, restarting")
+        # Don't spin if a worker dies straight away (e.g. bad config)
+        if time.time() - started < 5:
+            time.sleep(5)
+        new_pid = _spawn(sock, args.log_level)
+        workers[new_pid] = time.time()
+
+    sock.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+import numpy as np
+from processor.config import (
+    get_analysis_cache_config, get_model_mode, get_stt_engine,
+    get_whisper_preset, get_gliner_model, get_translation_config
+)
+
+STAGES = ["audio", "transcript", "translations", "entities", "global_stats"]
+# Remembered file digests; the oldest are dropped beyond this
+MAX_HASH_INDEX_ENTRIES = 1000
+
+_lock = threading.Lock()
+
+def _stage_fingerprint(stage, video_hash=None):
+    """
+    Model/config settings a stage's output depends on. Each stage includes the
+    fingerprint of the stage before it, so changing e.g. the STT engine also
+    invalidates translations and entities built on the old transcript.
+    """
+    if stage == "audio":
+        return {"sample_rate": 16000, "channels": 1}
+    if stage == "transcript":
+        fingerprint = {
+            "audio": _stage_fingerprint("audio"),
+            "mode": get_model_mode(),
+            "stt_engine": get_stt_engine(),
+            "whisper_model": get_whisper_preset()["model"]
+        }
+        if get_whisper_preset()["name"] != "default":
+            # The default preset decodes as before presets existed, so it keeps the old keys
+            fingerprint["whisper_preset"] = get_whisper_preset()["name"]
+        return fingerprint
+    if stage == "translations":
+        transcript = _stage_fingerprint("transcript")
+        stt = _cached_transcript_settings(video_hash)
+        if stt != {}:
+            # Tied to the VAD-split settings the transcript was made with, or to
+            # no cached transcript at all (None), which never matches a stored entry
+            transcript["stt"] = stt
+        return {
+            "transcript": transcript,
+            "translation_model": get_translation_config()["model"]
+        }
+    if stage == "entities":
+        return {
+            "translations": _stage_fingerprint("translations", video_hash),
+            "gliner_model": get_gliner_model()
+        }
+    if stage == "global_stats":
+        return {"entities": _stage_fingerprint("entities", video_hash)}
+    raise ValueError(f"Unknown analysis stage: {stage}")
+
+def _transcript_settings(data):
+    """
+    The STT path settings a transcript entry should have been made with under the
+    current config. Whether the parallel path applies depends on the audio's
+    language and length, which are only known after decoding, so they are stored
+    in the entry and checked on load rather than put in its key.
+    """
+    from processor.speech_to_text import transcript_settings
+    duration = data.get("duration") or max((seg["end"] for seg in data.get("segments", [])), default=0.0)
+    return transcript_settings(data.get("language"), duration)
+
+def _cached_transcript_settings(video_hash):
+    """
+    "stt" settings of the cached transcript the later stages are built on
+    ({} for the plain path), or None if there is no valid one.
+    """
+    if video_hash is None:
+        return None
+    data = _read_json(_entry_path(video_hash, "transcript", "default", ".json"))
+    if data is None:
+        return None
+    stt = data.get("stt", {})
+    return stt if stt == _transcript_settings(data) else None
+
+def _entry_path(video_hash, stage, variant, ext):
+    cfg = get_analysis_cache_config()
+    fingerprint = json.dumps({
+        "video": video_hash,
+        "stage": stage,
+        "variant": variant,
+        "config": _stage_fingerprint(stage, video_hash)
+    }, sort_keys=True)
+    key = hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()[:32]
+    return os.path.join(cfg["dir"], stage, key + ext)
+
+def hash_video_file(video_path, chunk_size=1024 * 1024):
+    """
+    SHA-256 of the video file contents. The digest is remembered against the
+    file's path, size and mtime so reopening the same file skips re-reading it.
+    """
+    cfg = get_analysis_cache_config()
+    index_path = os.path.join(cfg["dir"], "file_hashes.json")
+    st = os.stat(video_path)
+    stat_key = f"{os.path.abspath(video_path)}|{st.st_size}|{st.st_mtime_ns}"
+
+    with _lock:
+        index = _read_json(index_path) or {}
+    if stat_key in index:
+        return index[stat_key]
+
+    h = hashlib.sha256()
+    with open(video_path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            h.update(block)
+    digest = h.hexdigest()
+
+    if cfg["enabled"]:
+        with _lock:
+            index = _prune_hash_index(_read_json(index_path) or {})
+            index[stat_key] = digest
+            _write_json(index_path, index)
+    return digest
+
+def _prune_hash_index(index):
+    """
+    Drops entries for files that are gone or have changed since they were hashed
+    (e.g. uploads in per-job workspaces), then the oldest beyond MAX_HASH_INDEX_ENTRIES.
+    """
+    kept = {}
+    for stat_key, digest in index.items():
+        path, size, mtime_ns = stat_key.rsplit("|", 2)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        if str(st.st_size) == size and str(st.st_mtime_ns) == mtime_ns:
+            kept[stat_key] = digest
+    # Entries are kept in insertion order, oldest first
+    return dict(list(kept.items())[-(MAX_HASH_INDEX_ENTRIES - 1):])
+
+def load_stage(video_hash, stage, variant="default"):
+    """
+    Returns the cached output of a stage, or None on a miss.
+    """
+    if not get_analysis_cache_config()["enabled"]:
+        return None
+    path = _entry_path(video_hash, stage, variant, ".json")
+    with _lock:
+        data = _read_json(path)
+    if data is not None and stage == "transcript" and data.get("stt", {}) != _transcript_settings(data):
+        print("[Cache] Cached transcript was made with other STT settings")
+        return None
+    if data is not None:
+        with _lock:
+            _touch(path)
+        print(f"[Cache] Hit for stage '{stage}'")
+    return data
+
+def save_stage(video_hash, stage, data, variant="default"):
+    """
+    Stores a stage's output. A transcript should carry the audio "duration"
+    along with its "segments" and "language"; its STT settings are recorded with it.
+    """
+    cfg = get_analysis_cache_config()
+    if not cfg["enabled"]:
+        return
+    if stage == "transcript":
+        data = {**data, "stt": _transcript_settings(data)}
+    path = _entry_path(video_hash, stage, variant, ".json")
+    with _lock:
+        _write_json(path, data)
+        _enforce_size_limit(cfg)
+
+def load_audio(video_hash):
+    """
+    Returns the cached decoded audio (16 kHz mono float32) for the video, or None.
+    The array is memory-mapped, so nothing is decoded or copied up front.
+    """
+    if not get_analysis_cache_config()["enabled"]:
+        return None
+    path = _entry_path(video_hash, "audio", "default", ".npy")
+    with _lock:
+        if not os.path.exists(path):
+            return None
+        _touch(path)
+        try:
+            samples = np.load(path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+    print(f"[Cache] Hit for stage 'audio'")
+    return samples
+
+def save_audio(video_hash, samples):
+    """
+    Stores decoded audio in the cache and returns it (the same array; a failed
+    write is only logged).
+    """
+    cfg = get_analysis_cache_config()
+    if not cfg["enabled"] or not len(samples):
+        return samples
+    path = _entry_path(video_hash, "audio", "default", ".npy")
+    with _lock:
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, samples)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[Cache] Failed to store audio: {e}")
+            return samples
+        _enforce_size_limit(cfg, keep=path)
+    return samples
+
+def invalidate_stage(video_hash, stage, variant="default"):
+    for ext in (".json", ".npy"):
+        path = _entry_path(video_hash, stage, variant, ext)
+        with _lock:
+            if os.path.exists(path):
+                os.remove(path)
+
+def clear_analysis_cache():
+    cfg = get_analysis_cache_config()
+    with _lock:
+        for stage in STAGES:
+            shutil.rmtree(os.path.join(cfg["dir"], stage), ignore_errors=True)
+        index_path = os.path.join(cfg["dir"], "file_hashes.json")
+        if os.path.exists(index_path):
+            os.remove(index_path)
+
+def _enforce_size_limit(cfg, keep=None):
+    """
+    Evicts least recently used entries (by mtime, refreshed on every hit)
+    until the cache fits in max_bytes.
+    """
+    entries = []
+    total = 0
+    for stage in STAGES:
+        stage_dir = os.path.join(cfg["dir"], stage)
+        if not os.path.isdir(stage_dir):
+            continue
+        for name in os.listdir(stage_dir):
+            path = os.path.join(stage_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+
+    if total <= cfg["max_bytes"]:
+        return
+
+    entries.sort()
+    for mtime, size, path in entries:
+        if total <= cfg["max_bytes"]:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+            total -= size
+            print(f"[Cache] Evicted {path}")
+        except OSError:
+            pass
+
+def _touch(path):
+    try:
+        now = time.time()
+        os.utime(path, (now, now))
+    except OSError:
+        pass
+
+def _read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
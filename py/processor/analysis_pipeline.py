@@ -0,0 +1,113 @@
+import queue
+import threading
+
+_DONE = object()
+
+class PipelineCancelled(Exception):
+    pass
+
+def run_pipeline(source, stages, queue_size=32, on_item=None, cancel_event=None):
+    """
+    Runs a staged pipeline over a (possibly lazy) source of items.
+
+    stages is a list of (fn, batch_size). Each stage runs in its own thread and is
+    connected to the next one by a bounded queue; fn(batch) processes a list of
+    items in place. A stage blocks for its first item and then takes whatever else
+    is already queued (up to batch_size), so it works on small batches while the
+    upstream is slow and full batches once a backlog builds up.
+
+    on_item(item) is called as each item leaves the last stage.
+    Returns all items in source order. The first error raised by any stage stops
+    the pipeline and is re-raised here; setting cancel_event stops it with
+    PipelineCancelled.
+    """
+    queues = [queue.Queue(maxsize=queue_size) for _ in range(len(stages) + 1)]
+    stop = threading.Event()
+    errors = []
+    results = []
+
+    def put(q, item):
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def fail(e):
+        errors.append(e)
+        stop.set()
+
+    def produce():
+        try:
+            for item in source:
+                if not put(queues[0], item):
+                    return
+        except Exception as e:
+            fail(e)
+        finally:
+            put(queues[0], _DONE)
+
+    def work(index, fn, batch_size):
+        inbox, outbox = queues[index], queues[index + 1]
+        done = False
+        try:
+            while not done and not stop.is_set():
+                try:
+                    first = inbox.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if first is _DONE:
+                    break
+
+                batch = [first]
+                while len(batch) < batch_size:
+                    try:
+                        item = inbox.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _DONE:
+                        done = True
+                        break
+                    batch.append(item)
+
+                fn(batch)
+                for item in batch:
+                    if not put(outbox, item):
+                        return
+        except Exception as e:
+            fail(e)
+        finally:
+            put(outbox, _DONE)
+
+    threads = [threading.Thread(target=produce, daemon=True)]
+    for i, (fn, batch_size) in enumerate(stages):
+        threads.append(threading.Thread(target=work, args=(i, fn, max(1, batch_size)), daemon=True))
+    for t in threads:
+        t.start()
+
+    sink = queues[-1]
+    while not stop.is_set():
+        if cancel_event is not None and cancel_event.is_set():
+            fail(PipelineCancelled("Pipeline cancelled"))
+            break
+        try:
+            item = sink.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        if item is _DONE:
+            break
+        results.append(item)
+        if on_item is not None:
+            try:
+                on_item(item)
+            except Exception as e:
+                fail(e)
+
+    for t in threads:
+        t.join()
+
+    if errors:
+        raise errors[0]
+    return results
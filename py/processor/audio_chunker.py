@@ -0,0 +1,110 @@
+import io
+import wave
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+def load_wav_pcm16(audio_path):
+    """
+    Reads a WAV file into one contiguous int16 array (mono) plus its sample rate.
+    """
+    with wave.open(audio_path, "rb") as wf:
+        sample_rate = wf.getframerate()
+        channels = wf.getnchannels()
+        sample_width = wf.getsampwidth()
+        raw = wf.readframes(wf.getnframes())
+
+    if sample_width != 2:
+        raise ValueError(f"Expected 16-bit PCM, got {sample_width * 8}-bit audio in {audio_path}")
+
+    samples = np.frombuffer(raw, dtype=np.int16)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    return samples, sample_rate
+
+def to_pcm16(samples):
+    """
+    int16 view of a signal: float samples (-1..1, as decoded by
+    video_processor.decode_audio) are scaled and clipped, int16 is passed through.
+    """
+    if np.issubdtype(samples.dtype, np.floating):
+        return (np.clip(samples, -1.0, 1.0) * 32767.0).astype(np.int16)
+    return np.ascontiguousarray(samples, dtype=np.int16)
+
+def to_float32(samples):
+    """
+    float32 (-1..1) version of a signal, the input Whisper expects; float input is passed through.
+    """
+    if np.issubdtype(samples.dtype, np.floating):
+        return np.ascontiguousarray(samples, dtype=np.float32)
+    return samples.astype(np.float32) / 32768.0
+
+def plan_chunks(samples, sample_rate, max_seconds=29.0, snap_to_silence=True, search_seconds=4.0, frame_ms=20):
+    """
+    Splits the signal into (start, end) sample ranges no longer than max_seconds.
+
+    With snap_to_silence, each cut is moved back to the quietest frame within the
+    last search_seconds before the limit, so words are not sliced in half.
+    """
+    total = len(samples)
+    max_len = int(max_seconds * sample_rate)
+    if total <= max_len:
+        return [(0, total)] if total else []
+
+    frame = max(1, int(sample_rate * frame_ms / 1000))
+    search = int(search_seconds * sample_rate)
+
+    ranges = []
+    start = 0
+    while start < total:
+        limit = start + max_len
+        if limit >= total:
+            ranges.append((start, total))
+            break
+
+        cut = limit
+        if snap_to_silence:
+            window_start = max(start + frame, limit - search)
+            energy = _frame_energy(samples[window_start:limit], frame)
+            if len(energy):
+                cut = window_start + int(np.argmin(energy)) * frame + frame // 2
+
+        ranges.append((start, cut))
+        start = cut
+    return ranges
+
+def _frame_energy(samples, frame):
+    usable = len(samples) - (len(samples) % frame)
+    if usable <= 0:
+        return np.empty(0)
+    frames = samples[:usable].astype(np.float32).reshape(-1, frame)
+    return np.sqrt(np.mean(frames * frames, axis=1))
+
+def split_into_chunks(samples, sample_rate, max_seconds=29.0, snap_to_silence=True):
+    """
+    Returns chunk dicts whose "samples" are zero-copy views into the original buffer.
+    """
+    chunks = []
+    for i, (start, end) in enumerate(plan_chunks(samples, sample_rate, max_seconds, snap_to_silence)):
+        chunks.append({
+            "index": i,
+            "name": f"chunk_{i:03d}.wav",
+            "start": start / sample_rate,
+            "end": end / sample_rate,
+            "samples": samples[start:end],
+            "sample_rate": sample_rate
+        })
+    return chunks
+
+def encode_wav(samples, sample_rate):
+    """
+    Encodes mono samples (int16, or float -1..1) into an in-memory 16-bit WAV
+    file and returns its bytes.
+    """
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(to_pcm16(samples))
+    return buffer.getvalue()
@@ -26,13 +26,88 @@ def get_stt_engine():
         return "whisper"
     return STT_ENGINE
 
+# Whisper presets: model size, decoding and threading chosen together.
+# batch_size > 1 runs faster-whisper's batched pipeline (VAD-split chunks decoded
+# in batches, without conditioning on the previous text); batch_size 1 is the
+# sequential decoder, which carries context across windows. "default" is the
+# original sequential tiny/beam 5 decode; the batched presets are opt-in.
+# cpu_threads 0 lets CTranslate2 use every core.
+WHISPER_PRESETS = {
+    "default": {
+        "model": "tiny",
+        "beam_size": 5,
+        "batch_size": 1,
+        "compute_type": "int8",
+        "cpu_threads": 0,
+        "num_workers": 1
+    },
+    "fast": {
+        "model": "tiny",
+        "beam_size": 1,
+        "batch_size": 16,
+        "compute_type": "int8",
+        "cpu_threads": 0,
+        "num_workers": 1
+    },
+    "balanced": {
+        "model": "tiny",
+        "beam_size": 5,
+        "batch_size": 8,
+        "compute_type": "int8",
+        "cpu_threads": 0,
+        "num_workers": 1
+    },
+    "accurate": {
+        "model": "small",
+        "beam_size": 5,
+        "batch_size": 1,
+        "compute_type": "int8",
+        "cpu_threads": 0,
+        "num_workers": 1
+    }
+}
+
+WHISPER_PRESET = os.environ.get("ANTIGRAVITY_WHISPER_PRESET", "default")
+
+def set_whisper_preset(preset):
+    global WHISPER_PRESET
+    if preset not in WHISPER_PRESETS:
+        raise ValueError(f"Unknown Whisper preset: {preset}")
+    WHISPER_PRESET = preset
+    os.environ["ANTIGRAVITY_WHISPER_PRESET"] = preset
+
+def get_whisper_preset():
+    """
+    The active preset's settings, plus its "name". compute_type applies on CPU;
+    on CUDA the model always runs in float16.
+    """
+    name = WHISPER_PRESET if WHISPER_PRESET in WHISPER_PRESETS else "default"
+    return {"name": name, **WHISPER_PRESETS[name]}
+
 def get_whisper_model():
-    return "tiny" 
+    return get_whisper_preset()["model"]
+
+def get_parallel_stt_config():
+    # With workers > 1, long inputs are split at silences found by VAD and the speech
+    # regions are transcribed by that many processes, each with its own model
+    # and cpu_count / workers threads. Shorter inputs stay on the single-stream path.
+    return {
+        "workers": int(os.environ.get("ANTIGRAVITY_STT_WORKERS", "1")),
+        "max_region_seconds": float(os.environ.get("ANTIGRAVITY_STT_MAX_REGION_SECONDS", "60")),
+        "min_silence_ms": int(os.environ.get("ANTIGRAVITY_STT_MIN_SILENCE_MS", "500")),
+        "min_duration": float(os.environ.get("ANTIGRAVITY_STT_PARALLEL_MIN_SECONDS", "120"))
+    }
 
 def get_sarvam_config():
     # Using the user's provided Sarvam AI API key
     return {
-        "api_key": os.environ.get("SARVAM_API_KEY", "sk_4xz879a5_5p8lxlf8VCPUzDLgB7fPdUxw")
+        "api_key": os.environ.get("SARVAM_API_KEY", "sk_4xz879a5_5p8lxlf8VCPUzDLgB7fPdUxw"),
+        "stt_url": os.environ.get("SARVAM_STT_URL", "https://api.sarvam.ai/speech-to-text"),
+        # Concurrent chunk uploads and per-chunk retries (429/5xx back off across all workers)
+        "max_workers": int(os.environ.get("SARVAM_MAX_WORKERS", "4")),
+        "max_retries": int(os.environ.get("SARVAM_MAX_RETRIES", "4")),
+        # Move 29s chunk cuts back to the nearest quiet frame instead of cutting mid-word
+        "snap_to_silence": os.environ.get("SARVAM_SNAP_TO_SILENCE", "1") != "0"
     }
 
 def get_gliner_model():
@@ -40,6 +115,10 @@ def get_gliner_model():
         return "urchade/gliner_small-v2.1"
     return "urchade/gliner_multi-v2.1"
 
+def get_ner_batch_size():
+    # Number of segments GLiNER tags per forward pass
+    return int(os.environ.get("ANTIGRAVITY_NER_BATCH_SIZE", "16"))
+
 def get_sentence_transformer_model():
     # 'all-MiniLM-L6-v2' is ~80MB (English-heavy but fast)
     # 'paraphrase-multilingual-MiniLM-L12-v2' is ~471MB (Better for multi-lang)
@@ -58,3 +137,88 @@ def get_translation_config():
         "mode": "local"
     }
 
+
+# Analysis Cache Settings
+def get_analysis_cache_config():
+    # Per-stage results (audio, transcript, translations, entities, global stats)
+    # are cached on disk keyed by video content hash + the model settings above
+    return {
+        "enabled": os.environ.get("ANTIGRAVITY_ANALYSIS_CACHE", "1") != "0",
+        "dir": os.environ.get("ANTIGRAVITY_ANALYSIS_CACHE_DIR", os.path.join(os.getcwd(), ".analysis_cache")),
+        "max_bytes": int(os.environ.get("ANTIGRAVITY_ANALYSIS_CACHE_MAX_MB", "2048")) * 1024 * 1024
+    }
+
+# Every analysis/render job gets its own scratch directory under this root
+def get_workspace_dir():
+    return os.environ.get("ANTIGRAVITY_WORKSPACE_DIR", os.path.join(os.getcwd(), "temp", "jobs"))
+
+# Render Settings
+def get_render_config():
+    # "full" (default) pushes the whole video through one libx264; "smart" re-encodes
+    # only the keyframe-aligned spans that carry an overlay and stream-copies everything
+    # else; "parallel" re-encodes everything in GOP-aligned chunks on several ffmpeg processes
+    return {
+        "mode": os.environ.get("ANTIGRAVITY_RENDER_MODE", "full"),
+        "preset": os.environ.get("ANTIGRAVITY_RENDER_PRESET", "veryfast"),
+        # ffmpeg processes encoding spans at once (each gets cpu_count / workers threads)
+        # and how many chunks "parallel" mode cuts the timeline into
+        "workers": int(os.environ.get("ANTIGRAVITY_RENDER_WORKERS", str(os.cpu_count() or 1))),
+        "chunks": int(os.environ.get("ANTIGRAVITY_RENDER_CHUNKS", str(os.cpu_count() or 1))),
+        "output_dir": os.environ.get("ANTIGRAVITY_RENDER_OUTPUT_DIR", "output")
+    }
+
+def get_render_cache_config():
+    # Re-encoded overlay spans are kept so re-rendering after changing one card
+    # only encodes the spans whose overlays actually changed
+    return {
+        "enabled": os.environ.get("ANTIGRAVITY_RENDER_CACHE", "1") != "0",
+        "dir": os.environ.get("ANTIGRAVITY_RENDER_CACHE_DIR", os.path.join(os.getcwd(), ".render_cache")),
+        "max_bytes": int(os.environ.get("ANTIGRAVITY_RENDER_CACHE_MAX_MB", "4096")) * 1024 * 1024
+    }
+
+# Screenshot Settings
+def get_screenshot_config():
+    # Shared headless Chromium: number of reusable pages and how long it may sit idle
+    return {
+        "pool_size": int(os.environ.get("ANTIGRAVITY_BROWSER_POOL_SIZE", "2")),
+        "idle_timeout": int(os.environ.get("ANTIGRAVITY_BROWSER_IDLE_TIMEOUT", "300")),
+        "viewport": {"width": 1280, "height": 800}
+    }
+
+# Capture modes: "full" (default) waits for network idle with nothing blocked (slow on
+# ad-heavy news sites); "fast" is opt-in: it blocks heavy resources (including web
+# fonts) and ad hosts and waits for DOM readiness, so cards can look different
+CAPTURE_MODE = os.environ.get("ANTIGRAVITY_CAPTURE_MODE", "full")
+
+def set_capture_mode(mode):
+    global CAPTURE_MODE
+    CAPTURE_MODE = mode
+    os.environ["ANTIGRAVITY_CAPTURE_MODE"] = mode
+
+def get_capture_mode():
+    return CAPTURE_MODE
+
+def get_screenshot_cache_config():
+    # Rendered captures are reused across segments/re-selections for the same page and offset
+    return {
+        "enabled": os.environ.get("ANTIGRAVITY_SCREENSHOT_CACHE", "1") != "0",
+        "dir": os.environ.get("ANTIGRAVITY_SCREENSHOT_CACHE_DIR", os.path.join(os.getcwd(), ".screenshot_cache")),
+        "max_bytes": int(os.environ.get("ANTIGRAVITY_SCREENSHOT_CACHE_MAX_MB", "512")) * 1024 * 1024,
+        "ttl": int(os.environ.get("ANTIGRAVITY_SCREENSHOT_CACHE_TTL", str(24 * 3600)))
+    }
+
+# ML Service Settings
+def get_service_config():
+    # Concurrent analyses per service process and how many more may wait in the queue
+    return {
+        "workers": int(os.environ.get("ANTIGRAVITY_SERVICE_WORKERS", "2")),
+        "max_queue": int(os.environ.get("ANTIGRAVITY_SERVICE_MAX_QUEUE", "16")),
+        # Load all configured models at startup instead of on the first request
+        "preload": os.environ.get("ANTIGRAVITY_SERVICE_PRELOAD", "1") != "0",
+        # Set by the multi-process launcher so any worker can answer for any job
+        "shared_dir": os.environ.get("ANTIGRAVITY_SERVICE_SHARED_DIR") or None,
+        # Segments from all running jobs are tagged together in batches of up to
+        # ner_max_batch texts; a batch waits at most ner_max_wait_ms to fill up
+        "ner_max_batch": int(os.environ.get("ANTIGRAVITY_NER_MAX_BATCH", "32")),
+        "ner_max_wait_ms": float(os.environ.get("ANTIGRAVITY_NER_MAX_WAIT_MS", "10"))
+    }
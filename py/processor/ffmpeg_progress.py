@@ -0,0 +1,196 @@
+import subprocess
+import threading
+import time
+from collections import deque
+
+# Lines of ffmpeg's stderr kept for the error message; the rest is dropped as it streams
+STDERR_TAIL_LINES = 40
+
+class FFmpegCancelled(Exception):
+    pass
+
+def run_ffmpeg(command, on_progress=None, should_cancel=None):
+    """
+    Runs an ffmpeg command with `-progress pipe:1` and parses the key=value
+    blocks it writes (one roughly every 0.5 s) instead of waiting on the whole
+    encode. Each block is passed to on_progress(fields) as a dict, e.g.
+    {'frame': '1200', 'fps': '94.1', 'out_time_us': '40000000', 'speed': '3.1x', ...}.
+
+    should_cancel() is polled while ffmpeg runs; when it returns True the process
+    is asked to stop (SIGTERM, then SIGKILL) and FFmpegCancelled is raised.
+    """
+    command = [command[0], "-nostats", "-progress", "pipe:1", *command[1:]]
+    print(f"Executing Rendering: {' '.join(command)}")
+    proc = subprocess.Popen(
+        command,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        errors="replace"
+    )
+
+    stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+    stderr_thread = threading.Thread(target=_drain, args=(proc.stderr, stderr_tail), daemon=True)
+    stderr_thread.start()
+
+    cancelled = threading.Event()
+    watcher = None
+    if should_cancel is not None:
+        watcher = threading.Thread(target=_watch_cancel, args=(proc, should_cancel, cancelled), daemon=True)
+        watcher.start()
+
+    fields = {}
+    for line in proc.stdout:
+        key, sep, value = line.strip().partition("=")
+        if not sep:
+            continue
+        fields[key] = value
+        # "progress" (continue/end) closes each block
+        if key == "progress":
+            if on_progress is not None:
+                on_progress(fields)
+            fields = {}
+
+    proc.wait()
+    stderr_thread.join()
+    if watcher is not None:
+        watcher.join()
+
+    if cancelled.is_set():
+        raise FFmpegCancelled("FFmpeg was cancelled")
+    if proc.returncode != 0:
+        raise Exception(f"FFmpeg Rendering Failed: {''.join(stderr_tail)}")
+
+def _drain(stream, tail):
+    for line in stream:
+        tail.append(line)
+
+def _watch_cancel(proc, should_cancel, cancelled, interval=0.2):
+    while proc.poll() is None:
+        if should_cancel():
+            cancelled.set()
+            stop_process(proc)
+            return
+        time.sleep(interval)
+
+def stop_process(proc, timeout=2.0):
+    """
+    SIGTERM lets ffmpeg close its outputs; SIGKILL if it hasn't exited in time
+    (with an overlay graph it can stall flushing the filters after SIGTERM).
+    """
+    if proc.poll() is not None:
+        return
+    proc.terminate()
+    try:
+        proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+def out_time_seconds(fields):
+    # out_time_ms is in microseconds too (long-standing ffmpeg quirk); N/A before the first frame
+    for key in ("out_time_us", "out_time_ms"):
+        try:
+            return max(0.0, int(fields[key]) / 1e6)
+        except (KeyError, ValueError):
+            continue
+    return 0.0
+
+def _number(value):
+    try:
+        return float(str(value).rstrip("x"))
+    except ValueError:
+        return 0.0
+
+class RenderProgress:
+    """
+    Combines the progress of every ffmpeg process in one render (a single full
+    encode, or several span encodes running side by side) into one report:
+
+        {'frames', 'fps', 'speed', 'encoded_seconds', 'total_seconds',
+         'percent', 'elapsed', 'eta'}
+
+    fps and speed are summed over the processes currently running, so they
+    describe the render as a whole; eta is None until a speed is known.
+    callback is called at most every `interval` seconds, plus once at the end.
+    """
+
+    def __init__(self, total_seconds, callback=None, interval=0.5):
+        self.total_seconds = max(0.0, total_seconds)
+        self.callback = callback
+        self.interval = interval
+        self.start_time = time.time()
+        self._lock = threading.Lock()
+        self._running = {}
+        self._done_seconds = 0.0
+        self._done_frames = 0
+        self._last_emit = 0.0
+
+    def tracker(self, name, seconds):
+        """
+        on_progress callback for one ffmpeg process that encodes `seconds` of video.
+        """
+        def on_progress(fields):
+            status = {
+                "seconds": min(out_time_seconds(fields), seconds),
+                "frames": int(_number(fields.get("frame", 0))),
+                "fps": _number(fields.get("fps", 0)),
+                "speed": _number(fields.get("speed", 0))
+            }
+            with self._lock:
+                if fields.get("progress") == "end":
+                    # A stopped process ends early too, so count what it actually encoded
+                    self._running.pop(name, None)
+                    self._done_seconds += status["seconds"]
+                    self._done_frames += status["frames"]
+                else:
+                    self._running[name] = status
+            self._emit()
+        return on_progress
+
+    def finish(self):
+        with self._lock:
+            self._running.clear()
+            self._done_seconds = self.total_seconds
+        self._emit(force=True)
+
+    def snapshot(self):
+        with self._lock:
+            running = list(self._running.values())
+            encoded = self._done_seconds + sum(s["seconds"] for s in running)
+            frames = self._done_frames + sum(s["frames"] for s in running)
+        fps = sum(s["fps"] for s in running)
+        speed = sum(s["speed"] for s in running)
+        elapsed = time.time() - self.start_time
+        encoded = min(encoded, self.total_seconds)
+        remaining = self.total_seconds - encoded
+
+        if speed > 0:
+            eta = remaining / speed
+        elif encoded > 0:
+            # Between processes: fall back to the average rate so far
+            eta = remaining * elapsed / encoded
+        else:
+            eta = None
+
+        return {
+            "frames": frames,
+            "fps": fps,
+            "speed": speed,
+            "encoded_seconds": encoded,
+            "total_seconds": self.total_seconds,
+            "percent": 100.0 * encoded / self.total_seconds if self.total_seconds else 0.0,
+            "elapsed": elapsed,
+            "eta": eta
+        }
+
+    def _emit(self, force=False):
+        if self.callback is None:
+            return
+        now = time.time()
+        with self._lock:
+            if not force and now - self._last_emit < self.interval:
+                return
+            self._last_emit = now
+        self.callback(self.snapshot())
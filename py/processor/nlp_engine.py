@@ -1,42 +1,74 @@
 from gliner import GLiNER
 import nltk
 from nltk.tokenize import word_tokenize
-from nltk.tag import pos_tag
+from nltk.tag import pos_tag_sents
 from nltk.chunk import RegexpParser
 import os
-from processor.config import get_gliner_model
+from processor.config import get_gliner_model, get_ner_batch_size
 
 CACHE_DIR = os.path.join(os.getcwd(), ".model_cache")
 
 _gliner_model = None
 
-def get_entities_and_nouns(text):
-    """
-    State-of-the-art NLP engine using GLiNER (Zero-shot NER) and NLTK (POS Tagging).
-    """
+NER_LABELS = ["Person", "Organization", "Location", "Social Group", "Concept", "Phrase", "Politician", "Event", "Sentiment"]
+NER_THRESHOLD = 0.3
+NP_GRAMMAR = "NP: {<JJ.*>*<NN.*>+}"
+
+def _get_gliner_model():
     global _gliner_model
     if _gliner_model is None:
         model_path = get_gliner_model()
         _gliner_model = GLiNER.from_pretrained(model_path, cache_dir=CACHE_DIR)
+    return _gliner_model
+
+def get_entities_and_nouns(text):
+    """
+    State-of-the-art NLP engine using GLiNER (Zero-shot NER) and NLTK (POS Tagging).
+    """
+    return get_entities_and_nouns_batch([text], batch_size=1)[0]
 
-    labels = ["Person", "Organization", "Location", "Social Group", "Concept", "Phrase", "Politician", "Event", "Sentiment"]
-    entities = _gliner_model.predict_entities(text, labels, threshold=0.3)
+def get_entities_and_nouns_batch(texts, batch_size=None):
+    """
+    Batched version of get_entities_and_nouns.
+    Texts are sorted by length so each GLiNER batch is padded to similar lengths,
+    and the NLTK noun-phrase pass runs on the same batch before moving on.
+    Returns one entity list per input text, in input order.
+    """
+    if batch_size is None:
+        batch_size = get_ner_batch_size()
 
-    results = []
-    for ent in entities:
-        results.append({
-            "text": ent['text'],
-            "label": ent['label'].upper()
-        })
+    model = _get_gliner_model()
+    parser = RegexpParser(NP_GRAMMAR)
 
-    try:
-        tokens = word_tokenize(text)
-        tagged = pos_tag(tokens)
+    outputs = [[] for _ in texts]
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
 
-        grammar = "NP: {<JJ.*>*<NN.*>+}"
-        cp = RegexpParser(grammar)
-        tree = cp.parse(tagged)
+    for b in range(0, len(order), batch_size):
+        idxs = order[b:b+batch_size]
+        batch = [texts[i] for i in idxs]
 
+        if len(batch) == 1:
+            batch_entities = [model.predict_entities(batch[0], NER_LABELS, threshold=NER_THRESHOLD)]
+        else:
+            batch_entities = model.batch_predict_entities(batch, NER_LABELS, threshold=NER_THRESHOLD)
+
+        try:
+            tagged_batch = pos_tag_sents([word_tokenize(t) for t in batch])
+        except Exception as e:
+            print(f"POS Tagging failed: {e}")
+            tagged_batch = [None] * len(batch)
+
+        for i, entities, tagged in zip(idxs, batch_entities, tagged_batch):
+            results = [{"text": ent['text'], "label": ent['label'].upper()} for ent in entities]
+            if tagged is not None:
+                _add_noun_phrases(parser, tagged, results)
+            outputs[i] = _dedupe_entities(results)
+
+    return outputs
+
+def _add_noun_phrases(parser, tagged, results):
+    try:
+        tree = parser.parse(tagged)
         for subtree in tree.subtrees(filter=lambda t: t.label() == 'NP'):
             phrase = " ".join([word for word, tag in subtree.leaves()])
             if len(phrase.split()) > 1:
@@ -47,7 +79,8 @@ def get_entities_and_nouns(text):
                     })
     except Exception as e:
         print(f"POS Tagging failed: {e}")
-        
+
+def _dedupe_entities(results):
     seen = set()
     final_unique = []
     results.sort(key=lambda x: len(x['text']), reverse=True)
@@ -74,13 +107,18 @@ def build_global_entity_stats(segments):
     Iterates over all segments to extract entities and build global statistics.
     """
     global_stats = {}
+
+    # Use existing entities if present to avoid redundant GLiNER calls,
+    # and tag the remaining segments in one batched sweep
+    missing = [i for i, seg in enumerate(segments) if not seg.get('entities')]
+    extracted = {}
+    if missing:
+        texts = [segments[i].get('translated_text', segments[i]['text']) for i in missing]
+        batch_results = get_entities_and_nouns_batch(texts, batch_size=get_ner_batch_size())
+        extracted = dict(zip(missing, batch_results))
+
     for i, seg in enumerate(segments):
-        # Use existing entities if present to avoid redundant GLiNER calls
-        if 'entities' in seg and seg['entities']:
-            local_entities = seg['entities']
-        else:
-            text = seg.get('translated_text', seg['text'])
-            local_entities = get_entities_and_nouns(text)
+        local_entities = extracted[i] if i in extracted else seg['entities']
         
         for ent in local_entities:
             norm_text = normalize_entity(ent['text'])
@@ -164,6 +202,16 @@ def rank_entities_for_segment(segment_text, local_entities, global_stats, contex
     ranked.sort(key=lambda x: x.get('score', 0), reverse=True)
     return ranked[:5]
 
+def load_nlp_model(warm_up=True):
+    """
+    Loads GLiNER (and NLTK tagger data) ahead of the first request.
+    warm_up also runs one tiny prediction so lazy kernels/tables are initialised.
+    """
+    model = _get_gliner_model()
+    if warm_up:
+        get_entities_and_nouns_batch(["Warm up the entity model for New Delhi."], batch_size=1)
+    return model
+
 def unload_nlp_model():
     """
     Clears the GLiNER model from memory to free up RAM for other tasks (like semantic search).
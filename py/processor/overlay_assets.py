@@ -0,0 +1,136 @@
+import os
+import json
+import time
+import threading
+from processor.config import get_render_cache_config
+from processor.workspace import link_or_copy
+from processor import render_cache
+
+# Uncompressed RGBA Targa: ~10x faster for ffmpeg to decode than the same card as PNG
+ASSET_EXT = ".tga"
+
+_index_lock = threading.Lock()
+
+def prepare_overlay_assets(render_plan, workspace, width):
+    """
+    Asset stage that runs before the render. Every distinct screenshot (by
+    content hash, so the same page captured twice is one asset) is decoded,
+    scaled to `width` and padded onto a transparent canvas shared by all cards
+    once, then kept in the render cache so later renders skip it entirely.
+
+    Returns {"cards": {screenshot_path: asset_path}, "blank": path, "stats": {...}}
+    with the assets linked into the render's workspace.
+    """
+    from PIL import Image
+
+    start = time.time()
+    cfg = get_render_cache_config()
+    asset_dir = os.path.join(cfg["dir"], "cards") if cfg["enabled"] else os.path.join(workspace, "asset_store")
+    os.makedirs(asset_dir, exist_ok=True)
+    card_dir = os.path.join(workspace, "cards")
+    os.makedirs(card_dir, exist_ok=True)
+
+    # Headers only: enough to size the shared canvas without decoding any pixels
+    hashes = {}
+    heights = {}
+    for seg in render_plan:
+        path = seg['screenshot_path']
+        if path in hashes:
+            continue
+        hashes[path] = render_cache.hash_image(path)
+        with Image.open(path) as img:
+            heights[path] = max(1, round(img.height * width / img.width))
+    canvas_height = max(heights.values(), default=1)
+    size_tag = f"{width}x{canvas_height}"
+
+    index_path = os.path.join(asset_dir, "index.json")
+    with _index_lock:
+        index = _read_index(index_path)
+
+    assets = {}
+    prepared = 0
+    prepare_seconds = 0.0
+    for path, digest in hashes.items():
+        if digest in assets:
+            continue
+        asset_path = os.path.join(asset_dir, f"{digest[:32]}_{size_tag}{ASSET_EXT}")
+        if os.path.exists(asset_path):
+            _touch(asset_path)
+        else:
+            t0 = time.time()
+            with Image.open(path) as img:
+                scaled = img.convert("RGBA").resize((width, heights[path]), Image.LANCZOS)
+            canvas = Image.new("RGBA", (width, canvas_height), (0, 0, 0, 0))
+            canvas.paste(scaled, (0, 0))
+            tmp_path = f"{asset_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            canvas.save(tmp_path, format="TGA")
+            os.replace(tmp_path, asset_path)
+            cost = time.time() - t0
+            index[digest] = cost
+            prepared += 1
+            prepare_seconds += cost
+        assets[digest] = asset_path
+
+    blank_path = os.path.join(asset_dir, f"blank_{size_tag}{ASSET_EXT}")
+    if not os.path.exists(blank_path):
+        tmp_path = f"{blank_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        Image.new("RGBA", (width, canvas_height), (0, 0, 0, 0)).save(tmp_path, format="TGA")
+        os.replace(tmp_path, blank_path)
+
+    # Linked into the workspace so cache eviction by another render can't remove them mid-render
+    cards = {}
+    for i, digest in enumerate(assets):
+        local = os.path.join(card_dir, f"card_{i:04d}{ASSET_EXT}")
+        link_or_copy(assets[digest], local)
+        assets[digest] = local
+    for path, digest in hashes.items():
+        cards[path] = assets[digest]
+    blank = os.path.join(card_dir, f"blank{ASSET_EXT}")
+    link_or_copy(blank_path, blank)
+
+    if prepared:
+        with _index_lock:
+            merged = _read_index(index_path)
+            merged.update(index)
+            _write_index(index_path, merged)
+        if cfg["enabled"]:
+            render_cache.enforce_size_limit()
+
+    # Before this stage every card occurrence was decoded and scaled at full size;
+    # the recorded per-asset cost estimates what that would have taken
+    baseline = sum(index.get(hashes[seg['screenshot_path']], 0.0) for seg in render_plan)
+    stats = {
+        "cards": len(render_plan),
+        "unique_files": len(hashes),
+        "unique_images": len(assets),
+        "prepared": prepared,
+        "reused": len(assets) - prepared,
+        "prepare_seconds": prepare_seconds,
+        "baseline_seconds": baseline,
+        "saved_seconds": max(0.0, baseline - prepare_seconds),
+        "total_seconds": time.time() - start
+    }
+    print(f"[Render] Overlay assets: {stats['cards']} cards -> {stats['unique_images']} unique images "
+          f"({prepared} prepared, {stats['reused']} reused); decode/scale {prepare_seconds:.2f}s "
+          f"instead of ~{baseline:.2f}s, saved ~{stats['saved_seconds']:.2f}s")
+    return {"cards": cards, "blank": blank, "stats": stats}
+
+def _read_index(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _write_index(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+def _touch(path):
+    try:
+        now = time.time()
+        os.utime(path, (now, now))
+    except OSError:
+        pass
@@ -1,51 +1,465 @@
 import subprocess
+import bisect
+import json
+import csv
 import os
 import time
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from processor.config import get_render_config, get_render_cache_config
+from processor.workspace import job_workspace, link_or_copy
+from processor.overlay_assets import prepare_overlay_assets
+from processor.ffmpeg_progress import run_ffmpeg, RenderProgress, FFmpegCancelled
+from processor import analysis_cache, render_cache
 
-def render_with_screenshots(video_path, render_plan):
+OVERLAY_WIDTH = 400
+OVERLAY_MARGIN = 40
+# Longer than any input, so the card stream never ends before the video does
+TRAILING_BLANK_SECONDS = 86400
+
+def render_with_screenshots(video_path, render_plan, mode=None, chunks=None, on_progress=None, cancel_event=None):
     """
     Renders the final video by overlaying Wikipedia screenshots at specified timestamps.
     render_plan is a list of segments: [{'start', 'end', 'screenshot_path'}, ...]
+
+    mode "full" (default) re-encodes the whole video in one ffmpeg process.
+    mode "smart" only re-encodes the keyframe-aligned spans that carry an
+    overlay and stream-copies the rest of the video and the audio; it falls back to
+    "full" when the source can't be stream-copied into an H.264 timeline.
+    mode "parallel" re-encodes everything, split into `chunks` GOP-aligned parts
+    that are encoded by separate ffmpeg processes and concatenated.
+
+    on_progress(report) receives the combined encode progress (frames, fps,
+    speed, percent, eta, ... see RenderProgress) about twice a second. Setting
+    cancel_event stops every running ffmpeg process and raises FFmpegCancelled;
+    nothing is left in the output directory.
     """
+    cfg = get_render_config()
+    mode = mode or cfg["mode"]
+    should_cancel = cancel_event.is_set if cancel_event is not None else None
+
     timestamp = time.strftime("%Y%m%d_%H%M%S")
-    output_path = f"output/final_project_{timestamp}.mp4"
-    os.makedirs("output", exist_ok=True)
+    os.makedirs(cfg["output_dir"], exist_ok=True)
+    output_path = os.path.join(cfg["output_dir"], f"final_project_{timestamp}.mp4")
 
-    inputs = ["-i", video_path]
-    filter_parts = []
-    prev_label = "[0:v]"
+    info = probe_video(video_path)
+    with job_workspace("render") as workspace:
+        try:
+            # Small, deduplicated, pre-scaled cards shared by every encode below
+            cards = prepare_overlay_assets(render_plan, workspace, OVERLAY_WIDTH)
+            _check_cancel(should_cancel)
 
-    for i, seg in enumerate(render_plan):
-        inputs.extend(["-i", seg['screenshot_path']])
+            if mode == "smart":
+                if info.get("codec") == "h264" and info.get("pix_fmt") == "yuv420p":
+                    return _render_smart(video_path, render_plan, output_path, info, cfg, cards, workspace, on_progress, should_cancel)
+                print(f"[Render] Smart render needs 8-bit H.264 input (got {info.get('codec')}/{info.get('pix_fmt')}), doing a full render")
+            elif mode == "parallel":
+                if info.get("codec"):
+                    return _render_parallel(video_path, render_plan, output_path, info, cfg, cards, workspace,
+                                            chunks or cfg["chunks"], on_progress, should_cancel)
 
-        label = f"[v{i+1}]"
-        screenshot_idx = i + 1
+            return _render_full(video_path, render_plan, output_path, info, cfg, cards, workspace, on_progress, should_cancel)
+        except BaseException:
+            # Cancelled or failed: don't leave a truncated file behind
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            raise
 
-        part = f"[{screenshot_idx}:v]scale=400:-1[img{i}]; {prev_label}[img{i}]overlay=x=40:y=40:format=auto:enable='between(t,{seg['start']},{seg['end']})'"
+def _check_cancel(should_cancel):
+    if should_cancel is not None and should_cancel():
+        raise FFmpegCancelled("Render was cancelled")
 
-        if i == len(render_plan) - 1:
-            filter_parts.append(part)
-        else:
-            filter_parts.append(part + f"{label}; ")
-            prev_label = label
-
-    filter_complex = "".join(filter_parts)
+def _render_full(video_path, render_plan, output_path, info, cfg, cards, workspace, on_progress=None, should_cancel=None):
+    overlay_inputs, filter_complex = _overlay_args(render_plan, cards, workspace)
+    progress = RenderProgress(info.get("duration") or 0.0, on_progress)
 
     command = [
         "ffmpeg",
-        *inputs,
+        "-i", video_path,
+        *overlay_inputs,
         "-filter_complex", filter_complex,
+        "-map", "[vout]",
         "-map", "0:a?",
         "-codec:v", "libx264",
-        "-preset", "veryfast",
+        "-preset", cfg["preset"],
         "-y",
         output_path
     ]
+    run_ffmpeg(command, on_progress=progress.tracker("full", progress.total_seconds), should_cancel=should_cancel)
+    progress.finish()
+    return output_path
+
+def card_timeline(overlays, offset=0.0):
+    """
+    Flattens the overlays into consecutive (screenshot_path or None, duration)
+    steps starting at `offset`. Where cards overlap, the later one in the plan
+    wins, as it did when each card had its own overlay node stacked on top.
+    """
+    points = sorted({0.0} | {max(0.0, t - offset) for seg in overlays for t in (seg['start'], seg['end'])})
+    intervals = sorted((max(0.0, seg['start'] - offset), seg['end'] - offset, i) for i, seg in enumerate(overlays))
+
+    timeline = []
+    for a, b in zip(points, points[1:]):
+        mid = (a + b) / 2
+        active = [i for start, end, i in intervals if start <= mid < end]
+        path = overlays[max(active)]['screenshot_path'] if active else None
+        if timeline and timeline[-1][0] == path:
+            timeline[-1][1] += b - a
+        else:
+            timeline.append([path, b - a])
+    return timeline
 
-    print(f"Executing Rendering: {' '.join(command)}")
-    result = subprocess.run(command, capture_output=True, text=True)
+def _overlay_args(overlays, cards, workspace, offset=0.0):
+    """
+    Input arguments and filtergraph that overlay all cards through one concat
+    input and one overlay node, however many cards there are. The concat script
+    shows each prepared card for its duration and the blank canvas in between.
+    """
+    script_dir = tempfile.mkdtemp(prefix="timeline_", dir=workspace)
+    script_path = os.path.join(script_dir, "cards.txt")
+    with open(script_path, "w", encoding="utf-8") as f:
+        for path, duration in card_timeline(overlays, offset):
+            image = cards["cards"][path] if path else cards["blank"]
+            f.write(f"file '{os.path.abspath(image)}'\nduration {duration:.6f}\n")
+        # Trailing blank that outlasts the video (shortest=1 ends the output with
+        # the main input); the last entry has to be repeated for its duration to count
+        f.write(f"file '{os.path.abspath(cards['blank'])}'\nduration {TRAILING_BLANK_SECONDS}\n")
+        f.write(f"file '{os.path.abspath(cards['blank'])}'\n")
 
+    base = "[0:v]"
+    parts = []
+    if offset:
+        parts.append("[0:v]setpts=PTS-STARTPTS[base]")
+        base = "[base]"
+    parts.append(f"{base}[1:v]overlay=x={OVERLAY_MARGIN}:y={OVERLAY_MARGIN}:format=auto:shortest=1[vout]")
+    return ["-f", "concat", "-safe", "0", "-i", script_path], ";".join(parts)
+
+def probe_video(video_path):
+    """
+    Codec, pixel format, size, frame rate and duration of the first video stream.
+    """
+    result = subprocess.run([
+        "ffprobe", "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "stream=codec_name,pix_fmt,width,height,avg_frame_rate:format=duration",
+        "-of", "json",
+        video_path
+    ], capture_output=True, text=True)
     if result.returncode != 0:
-        raise Exception(f"FFmpeg Rendering Failed: {result.stderr}")
+        print(f"[Render] ffprobe failed: {result.stderr}")
+        return {}
+
+    data = json.loads(result.stdout or "{}")
+    stream = (data.get("streams") or [{}])[0]
+    num, _, den = (stream.get("avg_frame_rate") or "0/1").partition("/")
+    fps = float(num) / float(den) if den and float(den) else 0.0
+    return {
+        "codec": stream.get("codec_name"),
+        "pix_fmt": stream.get("pix_fmt"),
+        "width": stream.get("width"),
+        "height": stream.get("height"),
+        "fps": fps,
+        "duration": float(data.get("format", {}).get("duration") or 0.0)
+    }
+
+def count_frames(video_path):
+    """
+    Number of video packets (one per frame), counted without decoding. None if unreadable.
+    """
+    result = subprocess.run([
+        "ffprobe", "-v", "error",
+        "-select_streams", "v:0",
+        "-count_packets",
+        "-show_entries", "stream=nb_read_packets",
+        "-of", "csv=p=0",
+        video_path
+    ], capture_output=True, text=True)
+    try:
+        return int(result.stdout.strip().rstrip(","))
+    except ValueError:
+        return None
+
+def get_keyframes(video_path):
+    """
+    Presentation times of the video keyframes, read from packet flags (no decoding).
+    """
+    result = subprocess.run([
+        "ffprobe", "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,flags",
+        "-of", "csv=p=0",
+        video_path
+    ], capture_output=True, text=True)
+
+    keyframes = []
+    for line in result.stdout.splitlines():
+        pts_time, _, flags = line.partition(",")
+        if "K" in flags and pts_time not in ("", "N/A"):
+            keyframes.append(float(pts_time))
+    return sorted(keyframes)
+
+def _copy_timing(video_path):
+    """
+    (first_pts, dts_shift) of the video stream. The segment muxer measures its
+    cut times from the first packet, and streams with B-frames often start with a
+    negative DTS that the muxer shifts to zero, so the times it reports run ahead
+    of the presentation times ffprobe gives by dts_shift.
+    """
+    result = subprocess.run([
+        "ffprobe", "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,dts_time",
+        "-read_intervals", "%+#1",
+        "-of", "csv=p=0",
+        video_path
+    ], capture_output=True, text=True)
+    try:
+        pts_time, dts_time = result.stdout.split()[0].split(",")[:2]
+        return float(pts_time), max(0.0, -float(dts_time))
+    except (IndexError, ValueError):
+        return 0.0, 0.0
+
+def plan_cut_points(render_plan, keyframes, duration):
+    """
+    Cut times that isolate every overlay: each overlay interval is widened to the
+    keyframe at/before its start and the keyframe after its end, and intervals
+    that then touch are merged. Everything between them can be stream-copied.
+    """
+    intervals = []
+    for seg in sorted(render_plan, key=lambda s: s['start']):
+        i = bisect.bisect_right(keyframes, seg['start']) - 1
+        start = keyframes[i] if i >= 0 else 0.0
+        j = bisect.bisect_right(keyframes, seg['end'])
+        end = keyframes[j] if j < len(keyframes) else duration
+
+        if intervals and start <= intervals[-1][1]:
+            intervals[-1][1] = max(intervals[-1][1], end)
+        else:
+            intervals.append([start, end])
+
+    cuts = set()
+    for start, end in intervals:
+        if 0.0 < start < duration:
+            cuts.add(start)
+        if 0.0 < end < duration:
+            cuts.add(end)
+    return sorted(cuts)
+
+def split_at_keyframes(video_path, cut_points, workspace, codec="h264", should_cancel=None):
+    """
+    Stream-copies the video track into spans cut at cut_points (each one a
+    keyframe). Returns [{'path', 'start', 'end'}] using the muxer's actual cut times.
+
+    Spans keep their SPS/PPS in-band (Annex B), so copied and re-encoded spans with
+    different encoder settings can be concatenated without re-encoding either.
+    """
+    first_pts, shift = _copy_timing(video_path)
+    list_path = os.path.join(workspace, "spans.csv")
+    command = [
+        "ffmpeg", "-i", video_path,
+        "-map", "0:v:0", "-c", "copy",
+    ]
+    if codec in ("h264", "hevc"):
+        command += ["-bsf:v", f"{codec}_mp4toannexb"]
+    command += [
+        "-f", "segment",
+        "-segment_format", "matroska",
+        "-segment_list", list_path,
+        "-segment_list_type", "csv",
+        "-reset_timestamps", "1",
+    ]
+    if cut_points:
+        # The segment muxer cuts at the first keyframe at/after each time; back off
+        # a millisecond so rounding in the probed times can't push a cut one GOP late
+        command += ["-segment_times", ",".join(f"{max(0.0, t - first_pts - 0.001):.6f}" for t in cut_points)]
+    else:
+        # One span; the muxer would otherwise fall back to its 2 s default
+        command += ["-segment_time", "1000000"]
+    command += ["-y", os.path.join(workspace, "span_%04d.mkv")]
+    run_ffmpeg(command, should_cancel=should_cancel)
+
+    spans = []
+    with open(list_path, newline="") as f:
+        for name, start, end in csv.reader(f):
+            spans.append({
+                "path": os.path.join(workspace, name),
+                "start": max(0.0, float(start) - shift),
+                "end": max(0.0, float(end) - shift)
+            })
+    return spans
+
+def _encode_span(span, overlays, output_path, cfg, cards, workspace, threads=0, on_progress=None, should_cancel=None):
+    if overlays:
+        overlay_inputs, filter_complex = _overlay_args(overlays, cards, workspace, offset=span['start'])
+        video_args = [*overlay_inputs, "-filter_complex", filter_complex, "-map", "[vout]"]
+    else:
+        video_args = ["-map", "0:v"]
+
+    run_ffmpeg([
+        "ffmpeg",
+        "-i", span['path'],
+        *video_args,
+        "-codec:v", "libx264",
+        "-threads", str(threads),
+        "-preset", cfg["preset"],
+        "-pix_fmt", "yuv420p",
+        "-bsf:v", "h264_mp4toannexb",
+        "-f", "matroska",
+        "-y", output_path
+    ], on_progress=on_progress, should_cancel=should_cancel)
+
+    # A span with extra or missing frames would break the timing of everything
+    # concatenated after it, and would otherwise be stored in the render cache
+    expected, actual = count_frames(span['path']), count_frames(output_path)
+    if expected != actual:
+        raise Exception(f"Encoded span has {actual} frames, expected {expected}: {span['path']}")
+
+def _encode_settings(cfg):
+    # Everything besides the inputs that changes the bytes of an encoded span
+    return {
+        "codec": "libx264",
+        "preset": cfg["preset"],
+        "pix_fmt": "yuv420p",
+        "overlay_width": OVERLAY_WIDTH,
+        "overlay_margin": OVERLAY_MARGIN,
+        # Bumped when the filtergraph changes; v2 stops the output at the end of the video
+        "overlay_stream": "timeline_v2"
+    }
+
+def _concat_spans(video_path, span_paths, output_path, workspace, should_cancel=None):
+    """
+    Joins the spans with the concat demuxer (no re-encode) and muxes the source
+    audio back in by stream copy.
+    """
+    list_path = os.path.join(workspace, "concat.txt")
+    with open(list_path, "w", encoding="utf-8") as f:
+        for path, duration in span_paths:
+            f.write(f"file '{os.path.abspath(path)}'\n")
+            f.write(f"duration {duration:.6f}\n")
+
+    inputs = [
+        "ffmpeg",
+        "-f", "concat", "-safe", "0", "-i", list_path,
+        "-i", video_path,
+        "-map", "0:v", "-map", "1:a?",
+    ]
+    try:
+        run_ffmpeg(inputs + ["-c", "copy", "-y", output_path], should_cancel=should_cancel)
+    except FFmpegCancelled:
+        raise
+    except Exception:
+        # Source audio codec the container can't hold as-is: encode just the audio
+        run_ffmpeg(inputs + ["-c:v", "copy", "-c:a", "aac", "-y", output_path], should_cancel=should_cancel)
+
+def plan_chunk_points(keyframes, duration, chunks):
+    """
+    Cut times that split the timeline into `chunks` roughly equal, GOP-aligned parts.
+    """
+    cuts = set()
+    for i in range(1, chunks):
+        target = duration * i / chunks
+        j = bisect.bisect_left(keyframes, target)
+        nearest = min(keyframes[max(0, j - 1):j + 1], key=lambda k: abs(k - target))
+        if 0.0 < nearest < duration:
+            cuts.add(nearest)
+    return sorted(cuts)
+
+def _render_smart(video_path, render_plan, output_path, info, cfg, cards, workspace, on_progress=None, should_cancel=None):
+    keyframes = get_keyframes(video_path)
+    duration = info["duration"] or (keyframes[-1] if keyframes else 0.0)
+    if not keyframes or duration <= 0:
+        print("[Render] Could not read keyframes, doing a full render")
+        return _render_full(video_path, render_plan, output_path, info, cfg, cards, workspace, on_progress, should_cancel)
+
+    cut_points = plan_cut_points(render_plan, keyframes, duration)
+    return _render_spans(video_path, render_plan, output_path, info, cfg, cards, workspace, cut_points, duration,
+                         encode_all=False, on_progress=on_progress, should_cancel=should_cancel)
+
+def _render_parallel(video_path, render_plan, output_path, info, cfg, cards, workspace, chunks, on_progress=None, should_cancel=None):
+    keyframes = get_keyframes(video_path)
+    duration = info["duration"] or (keyframes[-1] if keyframes else 0.0)
+    if not keyframes or duration <= 0:
+        print("[Render] Could not read keyframes, doing a full render")
+        return _render_full(video_path, render_plan, output_path, info, cfg, cards, workspace, on_progress, should_cancel)
+
+    cut_points = plan_chunk_points(keyframes, duration, chunks)
+    return _render_spans(video_path, render_plan, output_path, info, cfg, cards, workspace, cut_points, duration,
+                         encode_all=True, on_progress=on_progress, should_cancel=should_cancel)
+
+def _render_spans(video_path, render_plan, output_path, info, cfg, cards, workspace, cut_points, duration, encode_all,
+                  on_progress=None, should_cancel=None):
+    """
+    Splits the video at cut_points, encodes the spans that need it (the ones with
+    overlays, or all of them with encode_all) on a pool of ffmpeg processes,
+    then concatenates everything. Encoded spans go through the render cache.
+    """
+    start_time = time.time()
+    workers = max(1, cfg["workers"])
+    # Each ffmpeg gets its share of the cores, so N processes don't each spawn a full x264 thread pool
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    render_cache_enabled = get_render_cache_config()["enabled"]
+
+    spans = split_at_keyframes(video_path, cut_points, workspace, codec=info.get("codec"), should_cancel=should_cancel)
+
+    video_hash = analysis_cache.hash_video_file(video_path) if render_cache_enabled else None
+    settings = _encode_settings(cfg)
+
+    span_paths = []
+    jobs = []
+    cached_spans = 0
+    for i, span in enumerate(spans):
+        # Cut times come back with millisecond rounding; don't let an overlay that
+        # starts/ends exactly on a cut pull in the neighbouring span
+        overlays = [
+            seg for seg in render_plan
+            if seg['start'] < span['end'] - 0.002 and seg['end'] > span['start'] + 0.002
+        ]
+        path = span['path']
+        if overlays or encode_all:
+            path = os.path.join(workspace, f"encoded_{i:04d}.mkv")
+            key = render_cache.span_key(video_hash, span, overlays, settings) if video_hash else None
+            cached = render_cache.lookup_span(key) if key else None
+            if cached is not None:
+                # Linked into the workspace so a concurrent eviction can't pull it from under the concat
+                link_or_copy(cached, path)
+                cached_spans += 1
+            else:
+                jobs.append((span, overlays, path, key))
+        span_paths.append((path, span['end'] - span['start']))
+
+    encoded_seconds = sum(span['end'] - span['start'] for span, _, _, _ in jobs)
+    progress = RenderProgress(encoded_seconds, on_progress)
+    # Set when any encode fails (or the user cancels) so the others stop too
+    abort = threading.Event()
+    stop = lambda: abort.is_set() or (should_cancel is not None and should_cancel())
+
+    def encode(job):
+        span, overlays, path, key = job
+        _check_cancel(stop)
+        tracker = progress.tracker(path, span['end'] - span['start'])
+        run = lambda out: _encode_span(span, overlays, out, cfg, cards, workspace, threads=threads,
+                                       on_progress=tracker, should_cancel=stop)
+        stored = render_cache.store_span(key, run) if key else None
+        if stored is not None:
+            link_or_copy(stored, path)
+        else:
+            run(path)
+
+    errors = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for future in as_completed([pool.submit(encode, job) for job in jobs]):
+            if future.exception() is not None:
+                abort.set()
+                errors.append(future.exception())
+    if errors:
+        # Report the encode that actually failed rather than the ones it stopped
+        raise next((e for e in errors if not isinstance(e, FFmpegCancelled)), errors[0])
+    progress.finish()
+
+    _concat_spans(video_path, span_paths, output_path, workspace, should_cancel=should_cancel)
 
+    print(f"[Render] Re-encoded {encoded_seconds:.1f}s of {duration:.1f}s in {len(jobs)} of {len(spans)} spans "
+          f"({cached_spans} reused from cache, {workers} workers x {threads} threads), "
+          f"{time.time() - start_time:.1f}s total")
     return output_path
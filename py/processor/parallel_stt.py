@@ -0,0 +1,139 @@
+import os
+import threading
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from processor.config import get_whisper_preset, get_parallel_stt_config
+
+SAMPLE_RATE = 16000
+CACHE_DIR = os.path.join(os.getcwd(), ".model_cache")
+
+_pool = None
+_pool_key = None
+_pool_lock = threading.Lock()
+
+# Set in each worker process by _init_worker
+_worker_model = None
+
+def _init_worker(model_name, compute_type, cpu_threads, download_root):
+    global _worker_model
+    from faster_whisper import WhisperModel
+    _worker_model = WhisperModel(
+        model_name,
+        device="cpu",
+        compute_type=compute_type,
+        cpu_threads=cpu_threads,
+        num_workers=1,
+        download_root=download_root
+    )
+
+def _detect_language(samples):
+    # Segments are lazy, so this only runs the language-ID pass
+    _, info = _worker_model.transcribe(samples, beam_size=1)
+    return info.language
+
+def _transcribe_region(samples, offset, language, beam_size):
+    segments, _ = _worker_model.transcribe(samples, language=language, beam_size=beam_size)
+    return [
+        {"start": offset + seg.start, "end": offset + seg.end, "text": seg.text.strip()}
+        for seg in segments
+    ]
+
+def _get_pool(workers):
+    """
+    Worker processes are started once and reused across transcriptions; each
+    loads its model in the initializer. Spawned rather than forked, so no Qt or
+    torch state from the parent is copied into them.
+    """
+    global _pool, _pool_key
+    preset = get_whisper_preset()
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    key = (workers, preset["model"], preset["compute_type"], threads)
+    with _pool_lock:
+        if _pool is not None and _pool_key != key:
+            _pool.shutdown(wait=True)
+            _pool = None
+        if _pool is None:
+            print(f"[DEBUG] Starting {workers} Whisper worker processes ({threads} threads each)...")
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(preset["model"], preset["compute_type"], threads, os.path.join(CACHE_DIR, "whisper"))
+            )
+            _pool_key = key
+        return _pool
+
+def shutdown_pool():
+    global _pool, _pool_key
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+            _pool = None
+            _pool_key = None
+
+def find_speech_regions(samples, max_region_seconds=60.0, min_silence_ms=500, workers=1):
+    """
+    Runs Silero VAD (bundled with faster-whisper) and groups the speech into
+    [(start_sample, end_sample)] regions of at most max_region_seconds. Regions
+    only ever end in a silence, and the silence between regions is dropped.
+    On short inputs regions are made smaller (down to 10 s) so every worker
+    gets about two of them.
+    """
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+    region_seconds = min(max_region_seconds, max(10.0, len(samples) / SAMPLE_RATE / (2 * workers)))
+    # Longer stretches of speech are cut by the VAD itself, at its quietest point
+    options = VadOptions(min_silence_duration_ms=min_silence_ms, max_speech_duration_s=region_seconds)
+    speech = get_speech_timestamps(samples, options)
+    max_len = int(region_seconds * SAMPLE_RATE)
+
+    regions = []
+    for ts in speech:
+        if regions and ts["end"] - regions[-1][0] <= max_len:
+            regions[-1][1] = ts["end"]
+        else:
+            regions.append([ts["start"], ts["end"]])
+    return [(start, end) for start, end in regions]
+
+def stream_parallel_whisper(samples, language=None, beam_size=5):
+    """
+    Transcribes 16 kHz float32 samples on the Whisper worker pool. Returns
+    (segments, language) like _stream_whisper: segments is a lazy iterator in
+    timeline order that yields each region as soon as it (and every region
+    before it) is done, with timestamps on the original timeline.
+    """
+    cfg = get_parallel_stt_config()
+    regions = find_speech_regions(samples, cfg["max_region_seconds"], cfg["min_silence_ms"], cfg["workers"])
+    speech_seconds = sum(end - start for start, end in regions) / SAMPLE_RATE
+    print(f"[DEBUG] VAD: {speech_seconds:.1f}s of speech in {len(samples) / SAMPLE_RATE:.1f}s, "
+          f"{len(regions)} regions for {cfg['workers']} workers")
+
+    pool = _get_pool(cfg["workers"])
+    # Plain arrays: slices of a memory-mapped cache entry would pickle the whole map
+    parts = [(np.array(samples[start:end], dtype=np.float32), start / SAMPLE_RATE) for start, end in regions]
+
+    try:
+        if language is None and parts:
+            # One language for the whole file, so regions can't each guess differently
+            language = pool.submit(_detect_language, parts[0][0][:30 * SAMPLE_RATE]).result()
+        futures = [pool.submit(_transcribe_region, part, offset, language, beam_size) for part, offset in parts]
+    except BrokenProcessPool:
+        # A worker died (e.g. the model failed to load); start fresh next time
+        shutdown_pool()
+        raise
+
+    def generate():
+        try:
+            for future in futures:
+                yield from future.result()
+        except BrokenProcessPool:
+            shutdown_pool()
+            raise
+        finally:
+            # Consumer stopped early (cancelled job): drop the regions not started yet
+            for future in futures:
+                future.cancel()
+
+    return generate(), language
@@ -0,0 +1,141 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from processor.config import get_render_cache_config
+
+_lock = threading.Lock()
+_image_hashes = {}
+
+def hash_image(path):
+    """
+    SHA-256 of an overlay image, memoised by path/size/mtime. Content rather than
+    path is hashed because re-cropping a screenshot can reuse the same filename.
+    """
+    st = os.stat(path)
+    stat_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    with _lock:
+        digest = _image_hashes.get(stat_key)
+    if digest is None:
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        with _lock:
+            _image_hashes[stat_key] = digest
+    return digest
+
+def span_key(video_hash, span, overlays, settings):
+    """
+    Cache key for one encoded span: source video, the span's time range, every
+    overlay image (by content) with its timing relative to the span, and the
+    encoder settings.
+    """
+    fingerprint = json.dumps({
+        "video": video_hash,
+        "start": round(span['start'], 3),
+        "end": round(span['end'], 3),
+        "overlays": [
+            [hash_image(seg['screenshot_path']), round(seg['start'] - span['start'], 3), round(seg['end'] - span['start'], 3)]
+            for seg in overlays
+        ],
+        "settings": settings
+    }, sort_keys=True)
+    return hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()[:32]
+
+def _entry_path(key):
+    return os.path.join(get_render_cache_config()["dir"], key + ".mkv")
+
+def lookup_span(key):
+    """
+    Returns the path of a cached encoded span, or None.
+    """
+    if not get_render_cache_config()["enabled"]:
+        return None
+    path = _entry_path(key)
+    with _lock:
+        if not os.path.exists(path):
+            return None
+        _touch(path)
+    return path
+
+def store_span(key, encode_fn):
+    """
+    Encodes a span straight into the cache with encode_fn(output_path) and
+    returns its cached path. Returns None when caching is disabled.
+    """
+    cfg = get_render_cache_config()
+    if not cfg["enabled"]:
+        return None
+    path = _entry_path(key)
+    os.makedirs(cfg["dir"], exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        encode_fn(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    with _lock:
+        _enforce_size_limit(cfg, keep=path)
+    return path
+
+def enforce_size_limit():
+    cfg = get_render_cache_config()
+    with _lock:
+        _enforce_size_limit(cfg)
+
+def clear_render_cache():
+    cfg = get_render_cache_config()
+    with _lock:
+        for path in _cache_files(cfg):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+def _cache_files(cfg):
+    # Encoded spans at the top level, prepared overlay cards under cards/
+    for directory in (cfg["dir"], os.path.join(cfg["dir"], "cards")):
+        if not os.path.isdir(directory):
+            continue
+        for name in os.listdir(directory):
+            if name.endswith((".mkv", ".tga")):
+                yield os.path.join(directory, name)
+
+def _enforce_size_limit(cfg, keep=None):
+    """
+    Evicts least recently used spans and cards (by mtime, refreshed on every hit)
+    until the cache fits in max_bytes.
+    """
+    entries = []
+    total = 0
+    for path in _cache_files(cfg):
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+        total += st.st_size
+
+    if total <= cfg["max_bytes"]:
+        return
+
+    entries.sort()
+    for mtime, size, path in entries:
+        if total <= cfg["max_bytes"]:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+            total -= size
+            print(f"[Render] Evicted cached {path}")
+        except OSError:
+            pass
+
+def _touch(path):
+    try:
+        now = time.time()
+        os.utime(path, (now, now))
+    except OSError:
+        pass
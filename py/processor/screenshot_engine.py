@@ -1,40 +1,509 @@
 import os
+import json
+import time
+import shutil
+import asyncio
+import hashlib
+import threading
+from collections import deque
+from urllib.parse import urlparse
+from processor.config import get_screenshot_config, get_screenshot_cache_config, get_capture_mode
+from processor.workspace import job_workspace
+
+# Pages are rendered once as a full-page image (down to the deepest reachable
+# V-Offset plus one viewport); every offset is then a local crop of that image
+MAX_Y_OFFSET = 10000
+
+# Settings that change what a capture looks like; part of the screenshot cache key
+RENDER_SETTINGS = {"full_page": True, "max_y_offset": MAX_Y_OFFSET}
+
+# How to load a page in "fast" capture mode. Domains match on suffix and only
+# list what differs from "default", which every other page uses. "full" mode
+# ignores this table and waits for network idle.
+DEFAULT_BLOCK_TYPES = ["media", "font", "websocket", "eventsource", "manifest", "texttrack"]
+
+LOAD_PROFILES = {
+    "default": {
+        "wait_until": "domcontentloaded",
+        "block_types": DEFAULT_BLOCK_TYPES,
+        "ready_selector": "body",
+        "settle_ms": 500
+    },
+    "wikipedia.org": {"ready_selector": "#content", "settle_ms": 300},
+    "bbc.com": {"ready_selector": "main, article", "settle_ms": 800},
+    "thehindu.com": {"ready_selector": "article, .article", "settle_ms": 800},
+    "ndtv.com": {"ready_selector": "article, .sp-cn", "settle_ms": 800},
+    "indiatimes.com": {"ready_selector": "article, main", "settle_ms": 800}
+}
+
+FULL_PROFILE = {"wait_until": "networkidle", "block_types": [], "ready_selector": None, "settle_ms": 500}
+
+# Ad/tracker hosts aborted in "fast" mode (suffix match)
+BLOCKED_HOSTS = {
+    "doubleclick.net", "googlesyndication.com", "googleadservices.com", "google-analytics.com",
+    "googletagmanager.com", "googletagservices.com", "adservice.google.com", "amazon-adsystem.com",
+    "facebook.net", "connect.facebook.net", "scorecardresearch.com", "taboola.com", "outbrain.com",
+    "criteo.com", "criteo.net", "adnxs.com", "rubiconproject.com", "pubmatic.com", "openx.net",
+    "casalemedia.com", "moatads.com", "hotjar.com", "chartbeat.com", "chartbeat.net", "quantserve.com",
+    "krxd.net", "adsafeprotected.com", "doubleverify.com", "izooto.com", "clevertap-prod.com",
+    "newrelic.com", "nr-data.net", "segment.io", "mixpanel.com", "branch.io"
+}
+
+# JS readiness signal: resolves once images in the first viewport have decoded (or after 3s)
+VIEWPORT_IMAGES_READY_JS = """
+() => new Promise(resolve => {
+    const visible = Array.from(document.images).filter(img => {
+        const r = img.getBoundingClientRect();
+        return r.top < window.innerHeight && r.bottom > 0;
+    });
+    const pending = visible.filter(img => !img.complete);
+    if (pending.length === 0) return resolve(true);
+    let left = pending.length;
+    const done = () => { if (--left <= 0) resolve(true); };
+    pending.forEach(img => { img.addEventListener('load', done); img.addEventListener('error', done); });
+    setTimeout(() => resolve(false), 3000);
+})
+"""
+
+# Recent capture latencies (seconds) for p50/p95 reporting
+_capture_latencies = deque(maxlen=500)
+
+_service = None
+_service_lock = threading.Lock()
+
+_cache_lock = threading.Lock()
+_key_locks = {}
+
+# Recently decoded full-page images, so scrubbing the offset doesn't re-decode the PNG
+_decoded_pages = {}
+_decoded_lock = threading.Lock()
+MAX_DECODED_PAGES = 3
+
+class BrowserService:
+    """
+    Long-lived headless Chromium shared by every capture in the process.
+
+    Playwright runs on a dedicated asyncio thread; callers from any thread
+    (GUI, workers, batch jobs) submit captures and block on the result.
+    A small pool of reusable pages lets captures run concurrently, dead
+    pages/browsers are replaced on checkout, and the browser is closed after
+    idle_timeout seconds without work (and relaunched on the next capture).
+    """
+
+    def __init__(self, pool_size=2, idle_timeout=300, viewport=None):
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self.viewport = viewport or {"width": 1280, "height": 800}
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="browser-service", daemon=True)
+        self._thread.start()
+
+        self._playwright = None
+        self._browser = None
+        self._pages = None
+        self._start_lock = None
+        self._last_used = time.monotonic()
+        self._active = 0
+
+        asyncio.run_coroutine_threadsafe(self._init_loop_state(), self._loop).result()
+
+    async def _init_loop_state(self):
+        self._start_lock = asyncio.Lock()
+        self._loop.create_task(self._idle_watcher())
+
+    def submit(self, coro_fn, *args, timeout=None):
+        """
+        Runs coro_fn(page, *args) on a pooled page and returns its result.
+        """
+        future = asyncio.run_coroutine_threadsafe(self._run_with_page(coro_fn, *args), self._loop)
+        return future.result(timeout)
+
+    def is_healthy(self):
+        return self._browser is not None and self._browser.is_connected()
+
+    async def _ensure_browser(self):
+        async with self._start_lock:
+            if self.is_healthy():
+                return
+            await self._close_browser()
+
+            from playwright.async_api import async_playwright
+            print(f"[Screenshot] Launching shared Chromium (pool of {self.pool_size} pages)...")
+            self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=True)
+            self._pages = asyncio.Queue()
+            for _ in range(self.pool_size):
+                await self._pages.put(None) # pages are created lazily on first checkout
+
+    async def _checkout_page(self):
+        await self._ensure_browser()
+        page = await self._pages.get()
+        if page is None or page.is_closed():
+            context = await self._browser.new_context(viewport=self.viewport)
+            page = await context.new_page()
+        return page
+
+    async def _release_page(self, page, healthy):
+        if self._pages is None:
+            return
+        if not healthy:
+            try:
+                await page.context.close()
+            except Exception:
+                pass
+            page = None
+        await self._pages.put(page)
+
+    async def _run_with_page(self, coro_fn, *args):
+        self._active += 1
+        page = None
+        healthy = True
+        try:
+            page = await self._checkout_page()
+            return await coro_fn(page, *args)
+        except Exception:
+            healthy = False
+            raise
+        finally:
+            if page is not None:
+                await self._release_page(page, healthy and self.is_healthy())
+            self._active -= 1
+            self._last_used = time.monotonic()
+
+    async def _idle_watcher(self):
+        while True:
+            await asyncio.sleep(min(30, self.idle_timeout))
+            if self._browser is not None and not self._browser.is_connected():
+                print("[Screenshot] Shared browser disconnected, will relaunch on next capture")
+                async with self._start_lock:
+                    await self._close_browser()
+                continue
+            idle_for = time.monotonic() - self._last_used
+            if self._browser is not None and self._active == 0 and idle_for > self.idle_timeout:
+                print(f"[Screenshot] Browser idle for {int(idle_for)}s, closing it")
+                async with self._start_lock:
+                    await self._close_browser()
+
+    async def _close_browser(self):
+        browser, playwright = self._browser, self._playwright
+        self._browser = None
+        self._playwright = None
+        self._pages = None
+        try:
+            if browser is not None:
+                await browser.close()
+        except Exception:
+            pass
+        try:
+            if playwright is not None:
+                await playwright.stop()
+        except Exception:
+            pass
+
+    def shutdown(self):
+        try:
+            asyncio.run_coroutine_threadsafe(self._close_browser(), self._loop).result(10)
+        except Exception:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+def get_browser_service():
+    """
+    Returns the process-wide BrowserService, creating it on first use.
+    """
+    global _service
+    with _service_lock:
+        if _service is None:
+            cfg = get_screenshot_config()
+            _service = BrowserService(
+                pool_size=cfg["pool_size"],
+                idle_timeout=cfg["idle_timeout"],
+                viewport=cfg["viewport"]
+            )
+        return _service
+
+def shutdown_browser_service():
+    global _service
+    with _service_lock:
+        if _service is not None:
+            _service.shutdown()
+            _service = None
+
+def _domain_matches(host, domain):
+    return host == domain or host.endswith("." + domain)
+
+def get_load_profile(url):
+    """
+    Resolves the load profile for a URL in the current capture mode.
+    """
+    if get_capture_mode() == "full":
+        return FULL_PROFILE
+    host = (urlparse(url).hostname or "").lower()
+    for domain, profile in LOAD_PROFILES.items():
+        if domain != "default" and _domain_matches(host, domain):
+            return {**LOAD_PROFILES["default"], **profile}
+    return LOAD_PROFILES["default"]
+
+def _is_blocked_host(url):
+    host = (urlparse(url).hostname or "").lower()
+    return any(_domain_matches(host, blocked) for blocked in BLOCKED_HOSTS)
+
+async def _capture_full_page(page, url, output_path, max_height):
+    profile = get_load_profile(url)
+    block_types = set(profile["block_types"])
+    blocking = get_capture_mode() != "full"
+
+    async def handle_route(route):
+        request = route.request
+        if request.resource_type in block_types or _is_blocked_host(request.url):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    if blocking:
+        await page.route("**/*", handle_route)
+
+    try:
+        # Navigate to URL
+        await page.goto(url, wait_until=profile["wait_until"], timeout=60000)
+
+        if profile["ready_selector"]:
+            try:
+                await page.wait_for_selector(profile["ready_selector"], state="visible", timeout=10000)
+            except Exception:
+                print(f"[Screenshot] Ready selector '{profile['ready_selector']}' not visible, capturing anyway")
+        if blocking:
+            await page.evaluate(VIEWPORT_IMAGES_READY_JS)
+
+        height = await page.evaluate("document.documentElement.scrollHeight")
+        height = max(1, min(int(height), max_height))
+
+        # Scroll through the capture area once so lazy-loaded content below the fold renders
+        await page.evaluate(f"window.scrollTo(0, {height})")
+        await page.wait_for_timeout(profile["settle_ms"])
+        await page.evaluate("window.scrollTo(0, 0)")
+
+        # Take screenshot
+        await page.screenshot(
+            path=output_path,
+            full_page=True,
+            clip={"x": 0, "y": 0, "width": page.viewport_size["width"], "height": height}
+        )
+    finally:
+        if blocking:
+            await page.unroute("**/*", handle_route)
+
+def get_capture_latency_stats():
+    """
+    p50/p95/max of recent capture latencies in seconds (None if nothing captured yet).
+    """
+    if not _capture_latencies:
+        return None
+    ordered = sorted(_capture_latencies)
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))]
+    return {"count": len(ordered), "p50": pct(0.50), "p95": pct(0.95), "max": ordered[-1]}
 
 def capture_article_screenshot(url, filename, y_offset=0):
     """
     Captures a website screenshot using Playwright (Local Renderer).
+    The page is loaded once through the shared browser service and cached as a full-page
+    render; the requested y_offset is cropped locally from it. With the screenshot cache
+    disabled the render goes to a scratch workspace that is removed after the crop.
     """
-    os.makedirs("output/screenshots", exist_ok=True)
-    final_output_path = f"output/screenshots/{filename}.png"
+    if not get_screenshot_cache_config()["enabled"]:
+        with job_workspace("screenshot") as workspace:
+            full_page_path = _render_full_page(url, os.path.join(workspace, "page.png"))
+            if full_page_path is None:
+                return None
+            return _crop_viewport(full_page_path, filename, y_offset)
+
+    full_page_path = _get_full_page(url)
+    if full_page_path is None:
+        return None
+    return _crop_viewport(full_page_path, filename, y_offset)
+
+def crop_cached_screenshot(url, filename, y_offset=0):
+    """
+    Re-crops an already captured page at a new offset without touching the network.
+    Returns None if the page has not been captured yet (or its render expired), or
+    if the screenshot cache is disabled.
+    """
+    cfg = get_screenshot_cache_config()
+    if not cfg["enabled"]:
+        return None
+    viewport = get_screenshot_config()["viewport"]
+    cache_path = os.path.join(cfg["dir"], _screenshot_cache_key(url, viewport) + ".png")
+    if not _cache_lookup(cache_path, cfg["ttl"]):
+        return None
+    return _crop_viewport(cache_path, filename, y_offset)
+
+def _get_full_page(url):
+    cfg = get_screenshot_cache_config()
+    viewport = get_screenshot_config()["viewport"]
+    key = _screenshot_cache_key(url, viewport)
+    cache_path = os.path.join(cfg["dir"], key + ".png")
+
+    # One capture per key at a time; concurrent requests for the same page wait and reuse it
+    with _cache_lock:
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+
+    with key_lock:
+        if _cache_lookup(cache_path, cfg["ttl"]):
+            print(f"[Screenshot] Cache hit for {url}")
+            return cache_path
+
+        tmp_path = os.path.join(cfg["dir"], f"{key}.{os.getpid()}.{threading.get_ident()}.partial.png")
+        try:
+            os.makedirs(cfg["dir"], exist_ok=True)
+            if _render_full_page(url, tmp_path) is None:
+                return None
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"[Screenshot] Could not store render of {url}: {e}")
+            return None
+        finally:
+            # Eviction skips partial files, so one left behind would never be cleaned up
+            if os.path.exists(tmp_path):
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+        with _cache_lock:
+            _evict_screenshot_cache(cfg, keep=cache_path)
+        return cache_path
 
+def _render_full_page(url, output_path):
+    """
+    Loads the page through the browser service and writes its full-page render
+    to output_path. Returns output_path, or None if the capture failed.
+    """
+    viewport = get_screenshot_config()["viewport"]
     try:
-        from playwright.sync_api import sync_playwright
-        
-        print(f"[Screenshot] Launching Playwright to capture {url}...")
-        with sync_playwright() as p:
-            # Launch browser
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page(viewport={'width': 1280, 'height': 800})
-            
-            # Navigate to URL
-            page.goto(url, wait_until="networkidle", timeout=60000)
-            
-            # Apply vertical offset if specified
-            if y_offset > 0:
-                print(f"[Screenshot] Scrolling to y-offset: {y_offset}")
-                page.evaluate(f"window.scrollTo(0, {y_offset})")
-                # Wait a bit for lazy-loaded content to stabilize if any
-                page.wait_for_timeout(500)
-            
-            # Take screenshot
-            page.screenshot(path=final_output_path)
-            browser.close()
-            
-        if os.path.exists(final_output_path):
-            print(f"[Screenshot] Saved local Playwright render to {final_output_path}")
-            return final_output_path
-            
+        print(f"[Screenshot] Capturing {url}...")
+        started = time.perf_counter()
+        get_browser_service().submit(_capture_full_page, url, output_path, MAX_Y_OFFSET + viewport["height"])
+        elapsed = time.perf_counter() - started
+
+        if os.path.exists(output_path):
+            _capture_latencies.append(elapsed)
+            stats = get_capture_latency_stats()
+            print(f"[Screenshot] Rendered full page for {url} ({elapsed:.2f}s, p50 {stats['p50']:.2f}s, p95 {stats['p95']:.2f}s)")
+            return output_path
+
     except Exception as e:
         print(f"[Screenshot] Playwright Error: {e}")
 
     return None
+
+def _crop_viewport(full_page_path, filename, y_offset):
+    from PIL import Image
+
+    os.makedirs("output/screenshots", exist_ok=True)
+    final_output_path = f"output/screenshots/{filename}.png"
+    viewport = get_screenshot_config()["viewport"]
+
+    try:
+        image = _load_decoded_page(full_page_path)
+        top = max(0, min(int(y_offset), image.height - viewport["height"]))
+        bottom = min(image.height, top + viewport["height"])
+        image.crop((0, top, min(image.width, viewport["width"]), bottom)).save(final_output_path, compress_level=1)
+    except Exception as e:
+        print(f"[Screenshot] Crop Error: {e}")
+        return None
+
+    print(f"[Screenshot] Saved local Playwright render to {final_output_path} (y={top})")
+    return final_output_path
+
+def _load_decoded_page(path):
+    from PIL import Image
+
+    mtime = os.path.getmtime(path)
+    with _decoded_lock:
+        entry = _decoded_pages.get(path)
+        if entry and entry[0] == mtime:
+            return entry[1]
+
+    image = Image.open(path)
+    image.load()
+
+    with _decoded_lock:
+        _decoded_pages[path] = (mtime, image)
+        while len(_decoded_pages) > MAX_DECODED_PAGES:
+            _decoded_pages.pop(next(iter(_decoded_pages)))
+    return image
+
+def _screenshot_cache_key(url, viewport):
+    payload = json.dumps({
+        "url": url,
+        "viewport": viewport,
+        "render": RENDER_SETTINGS,
+        "mode": get_capture_mode(),
+        "profile": get_load_profile(url)
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+def _cache_lookup(cache_path, ttl):
+    """
+    A cached render is valid if it exists and was captured less than ttl seconds ago.
+    mtime records the capture time (for TTL), atime the last use (for LRU).
+    """
+    try:
+        st = os.stat(cache_path)
+    except OSError:
+        return False
+    if ttl > 0 and time.time() - st.st_mtime > ttl:
+        try:
+            os.remove(cache_path)
+        except OSError:
+            pass
+        return False
+    try:
+        os.utime(cache_path, (time.time(), st.st_mtime))
+    except OSError:
+        pass
+    return True
+
+def _evict_screenshot_cache(cfg, keep=None):
+    """
+    Drops expired renders, then least recently used ones until the cache fits in max_bytes.
+    """
+    entries = []
+    total = 0
+    now = time.time()
+    for name in os.listdir(cfg["dir"]):
+        if not name.endswith(".png") or ".partial." in name:
+            continue
+        path = os.path.join(cfg["dir"], name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        if cfg["ttl"] > 0 and now - st.st_mtime > cfg["ttl"]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            continue
+        entries.append((st.st_atime, st.st_size, path))
+        total += st.st_size
+
+    entries.sort()
+    for atime, size, path in entries:
+        if total <= cfg["max_bytes"]:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+def clear_screenshot_cache():
+    cfg = get_screenshot_cache_config()
+    with _cache_lock:
+        shutil.rmtree(cfg["dir"], ignore_errors=True)
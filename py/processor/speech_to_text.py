@@ -1,153 +1,452 @@
 import os
+import time
+import random
+import threading
 import torch
 import requests
-from processor.config import get_whisper_model, get_stt_engine, get_sarvam_config
+import numpy as np
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor
+from processor.audio_chunker import load_wav_pcm16, split_into_chunks, encode_wav, to_float32, SAMPLE_RATE
+from processor.config import get_whisper_preset, get_stt_engine, get_sarvam_config, get_parallel_stt_config
 
 CACHE_DIR = os.path.join(os.getcwd(), ".model_cache")
 
 _whisper_model = None
+_whisper_model_key = None
 
-def transcribe_audio_with_timestamps(audio_path, video_path=None):
+# Languages sent to Sarvam; anything else detected goes to Whisper instead
+SARVAM_STT_LANGUAGES = {"hi", "te", "ta", "kn", "ml", "mr", "bn", "gu", "pa", "as", "or"}
+# Used when no speech was found to detect a language from
+DEFAULT_LANGUAGE = "hi"
+
+def transcribe_audio_with_timestamps(audio_path, language=None):
     """
     Transcribe audio with timestamps using either Whisper or Sarvam AI.
+    audio_path is a WAV path or a 16 kHz float32 array from decode_audio.
     """
-    engine = get_stt_engine()
+    engine, language = _route(audio_path, language)
     print(f"[DEBUG] Selected STT Engine: {engine}")
     
     if engine == "sarvam":
-        return _transcribe_sarvam(audio_path, video_path)
+        return _transcribe_sarvam(audio_path, language)
+    else:
+        return _transcribe_whisper(audio_path, language)
+
+def stream_transcribe_audio(audio_path, language=None):
+    """
+    Streaming variant of transcribe_audio_with_timestamps.
+    Returns (segments, language) where segments is a lazy iterator, so callers
+    can start working on early segments while later audio is still decoding.
+    """
+    engine, language = _route(audio_path, language)
+    print(f"[DEBUG] Selected STT Engine (streaming): {engine}")
+
+    if engine == "sarvam":
+        return _stream_sarvam(audio_path, language)
     else:
-        return _transcribe_whisper(audio_path)
+        return _stream_whisper(audio_path, language)
+
+def detect_language(audio_path, seconds=30.0):
+    """
+    Whisper language ID on roughly the first `seconds` of speech (VAD skips
+    leading silence/music; only that much audio is ever looked at).
+    Returns (language, probability), or (None, 0.0) if no speech was found.
+    """
+    start = time.time()
+    samples = _as_samples(audio_path)
+    # Twice the window so the VAD still leaves ~30 s of speech after an intro
+    clip = np.ascontiguousarray(samples[:int(seconds * 2 * SAMPLE_RATE)], dtype=np.float32)
+    try:
+        # Segments are lazy, so only the language-ID pass runs here
+        _, info = _get_whisper_model().transcribe(clip, beam_size=1, vad_filter=True)
+        language, probability = info.language, info.language_probability
+    except Exception as e:
+        print(f"[DEBUG] Language detection failed: {e}")
+        return None, 0.0
+    print(f"[DEBUG] Detected language: {language} (p={probability:.2f}) in {time.time() - start:.2f}s")
+    return language, probability
 
-def _transcribe_whisper(audio_path, video_path=None):
+def _route(audio_path, language=None):
+    """
+    Picks the STT engine before the expensive pass. With Sarvam configured, the
+    language is detected up front and only Indian-language audio is sent there;
+    everything else goes straight to Whisper with the language already known,
+    so a wrong guess never costs a second full transcription.
+    """
+    engine = get_stt_engine()
+    if engine != "sarvam":
+        return engine, language
+
+    if language is None:
+        language, _ = detect_language(audio_path)
+        if language is None:
+            language = DEFAULT_LANGUAGE
+    if language not in SARVAM_STT_LANGUAGES:
+        print(f"[DEBUG] Routing '{language}' audio to Whisper instead of Sarvam")
+        return "whisper", language
+    return engine, language
+
+def transcript_settings(language, duration):
+    """
+    What shapes a transcript of `duration` seconds of `language` audio besides
+    the model config: the VAD-split settings when it takes the parallel Whisper
+    path, nothing otherwise. Cached transcripts are checked against this.
+    """
+    if get_stt_engine() == "sarvam" and language in SARVAM_STT_LANGUAGES:
+        return {}
+    parallel = get_parallel_stt_config()
+    if not _use_parallel(duration, parallel):
+        return {}
+    return {"parallel": {key: parallel[key] for key in ("workers", "max_region_seconds", "min_silence_ms")}}
+
+def _use_parallel(duration, parallel):
+    return parallel["workers"] > 1 and duration >= parallel["min_duration"]
+
+def _as_samples(audio_path):
+    if isinstance(audio_path, np.ndarray):
+        return audio_path
+    from faster_whisper import decode_audio
+    return decode_audio(audio_path, sampling_rate=SAMPLE_RATE)
+
+def _get_whisper_model():
     from faster_whisper import WhisperModel
-    global _whisper_model
-    print(f"[DEBUG] Starting Whisper transcription for: {audio_path}")
+    global _whisper_model, _whisper_model_key
+    preset = get_whisper_preset()
+    key = (preset["model"], preset["compute_type"], preset["cpu_threads"], preset["num_workers"])
+    if _whisper_model is not None and _whisper_model_key != key:
+        # Preset switched to a different model or threading setup
+        _whisper_model = None
     if _whisper_model is None:
-        model_name = get_whisper_model()
-        print(f"[DEBUG] Loading Whisper model: {model_name}...")
+        print(f"[DEBUG] Loading Whisper model: {preset['model']} (preset '{preset['name']}')...")
         device = "cuda" if torch.cuda.is_available() else "cpu"
         _whisper_model = WhisperModel(
-            model_name,
+            preset["model"],
             device=device,
-            compute_type="int8" if device == "cpu" else "float16",
+            compute_type=preset["compute_type"] if device == "cpu" else "float16",
+            cpu_threads=preset["cpu_threads"],
+            num_workers=preset["num_workers"],
             download_root=os.path.join(CACHE_DIR, "whisper")
         )
+        _whisper_model_key = key
+    return _whisper_model
+
+def _transcribe_whisper(audio_path, language=None):
+    segments, language = _stream_whisper(audio_path, language)
+    return list(segments), language
 
-    segments, info = _whisper_model.transcribe(audio_path, beam_size=5)
+def _stream_whisper(audio_path, language=None):
+    print(f"[DEBUG] Starting Whisper transcription for: {_describe(audio_path)}")
+    preset = get_whisper_preset()
 
-    results = []
-    for segment in segments:
-        results.append({
-            "start": segment.start,
-            "end": segment.end,
-            "text": segment.text.strip()
-        })
+    parallel = get_parallel_stt_config()
+    if parallel["workers"] > 1:
+        from processor.parallel_stt import stream_parallel_whisper
+        samples = _as_samples(audio_path)
+        if _use_parallel(len(samples) / SAMPLE_RATE, parallel):
+            return stream_parallel_whisper(samples, language=language, beam_size=preset["beam_size"])
+        audio_path = samples
 
-    return results, info.language
+    model = _get_whisper_model()
 
-def _transcribe_sarvam(audio_path, video_path=None):
+    # faster-whisper decodes lazily; language is known before the first segment
+    if preset["batch_size"] > 1:
+        from faster_whisper import BatchedInferencePipeline
+        pipeline = BatchedInferencePipeline(model)
+        segments, info = pipeline.transcribe(audio_path, language=language, beam_size=preset["beam_size"], batch_size=preset["batch_size"])
+    else:
+        segments, info = model.transcribe(audio_path, language=language, beam_size=preset["beam_size"])
+
+    def generate():
+        for segment in segments:
+            yield {
+                "start": segment.start,
+                "end": segment.end,
+                "text": segment.text.strip()
+            }
+
+    return generate(), info.language
+
+def _transcribe_sarvam(audio_path, language):
     """
     Transcribe using Sarvam AI (API).
     Handles files longer than 30s by chunking locally.
     """
-    print(f"[DEBUG] Starting Sarvam AI transcription for: {audio_path}")
+    print(f"[DEBUG] Starting Sarvam AI transcription for: {_describe(audio_path)}")
     config = get_sarvam_config()
     api_key = config["api_key"]
 
     if not api_key:
         print("[DEBUG] ERROR: No Sarvam API key found. Falling back to Whisper.")
-        return _transcribe_whisper(audio_path)
+        return _transcribe_whisper(audio_path, language)
 
-    # Chunk the audio into 29s pieces to stay safely under the 30s limit
-    os.makedirs("temp/chunks", exist_ok=True)
-    import subprocess
-    import glob
-    
-    # Clear old chunks
-    for f in glob.glob("temp/chunks/chunk_*.wav"):
-        try: os.remove(f)
-        except: pass
-        
-    print(f"[DEBUG] Splitting audio into 29s chunks...")
-    subprocess.run([
-        "ffmpeg", "-i", audio_path,
-        "-f", "segment", "-segment_time", "29",
-        "-c", "copy", "temp/chunks/chunk_%03d.wav", "-y"
-    ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-    
-    chunk_files = sorted(glob.glob("temp/chunks/chunk_*.wav"))
-    if not chunk_files:
+    chunks = _split_sarvam_chunks(audio_path)
+    if not chunks:
         print("[DEBUG] ERROR: Failed to chunk audio.")
-        return _transcribe_whisper(audio_path)
+        return _transcribe_whisper(audio_path, language)
 
-    url = "https://api.sarvam.ai/speech-to-text"
-    headers = {"api-subscription-key": api_key}
-    
-    all_results = []
-    total_offset = 0.0
-    
-    for i, chunk_path in enumerate(chunk_files):
-        print(f"[DEBUG] Processing chunk {i+1}/{len(chunk_files)}: {chunk_path}")
+    # Failed chunks are re-transcribed locally inside _iter_sarvam_chunks
+    all_results = list(_iter_sarvam_chunks(chunks, api_key, language))
+
+    print(f"[DEBUG] Sarvam complete. Total segments: {len(all_results)}. Language: {language}")
+    return all_results, language
+
+def _stream_sarvam(audio_path, language):
+    print(f"[DEBUG] Starting Sarvam AI transcription for: {_describe(audio_path)}")
+    config = get_sarvam_config()
+    api_key = config["api_key"]
+
+    if not api_key:
+        print("[DEBUG] ERROR: No Sarvam API key found. Falling back to Whisper.")
+        return _stream_whisper(audio_path, language)
+
+    chunks = _split_sarvam_chunks(audio_path)
+    if not chunks:
+        print("[DEBUG] ERROR: Failed to chunk audio.")
+        return _stream_whisper(audio_path, language)
+
+    def generate():
+        produced = 0
+        # Failed chunks are re-transcribed locally inside _iter_sarvam_chunks
+        for seg in _iter_sarvam_chunks(chunks, api_key, language):
+            produced += 1
+            yield seg
+        print(f"[DEBUG] Sarvam complete. Total segments: {produced}. Language: {language}")
+
+    return generate(), language
+
+def _describe(audio):
+    if isinstance(audio, np.ndarray):
+        return f"<decoded audio, {len(audio) / SAMPLE_RATE:.1f}s>"
+    return audio
+
+def _split_sarvam_chunks(audio_path):
+    """
+    Splits the extracted audio into <=29s chunks in memory (no temp files), so
+    concurrent jobs never share a chunk directory. Cuts snap to nearby silence.
+    """
+    config = get_sarvam_config()
+    try:
+        if isinstance(audio_path, np.ndarray):
+            # Already decoded in memory; chunks are views and are converted to 16-bit on upload
+            samples, sample_rate = audio_path, SAMPLE_RATE
+        else:
+            samples, sample_rate = load_wav_pcm16(audio_path)
+    except Exception as e:
+        print(f"[DEBUG] ERROR: Could not read audio for chunking: {e}")
+        return []
+
+    # Chunk the audio into 29s pieces to stay safely under the 30s limit
+    print(f"[DEBUG] Splitting audio into 29s chunks (snap to silence: {config['snap_to_silence']})...")
+    return split_into_chunks(samples, sample_rate, max_seconds=29.0, snap_to_silence=config["snap_to_silence"])
+
+class _SharedBackoff:
+    """
+    Rate-limit backoff shared by all upload workers: when any worker gets a 429,
+    every worker holds off until the backoff window has passed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._resume_at = 0.0
+
+    def wait(self):
+        while True:
+            with self._lock:
+                delay = self._resume_at - time.monotonic()
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+    def rate_limited(self, attempt, retry_after=None):
+        delay = _retry_after_seconds(retry_after)
+        if delay is None:
+            delay = (2 ** attempt) + random.uniform(0, 1)
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + delay)
+        return delay
+
+def _retry_after_seconds(value):
+    """
+    Seconds to wait from a Retry-After header, given either as a number of seconds
+    or as an HTTP date. None if it is missing or unreadable.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+_sarvam_session = None
+_sarvam_session_lock = threading.Lock()
+
+def _get_sarvam_session(pool_size):
+    # Keep-alive connection pool reused across chunks and transcriptions
+    global _sarvam_session
+    with _sarvam_session_lock:
+        if _sarvam_session is None:
+            from requests.adapters import HTTPAdapter
+            _sarvam_session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+            _sarvam_session.mount("https://", adapter)
+            _sarvam_session.mount("http://", adapter)
+        return _sarvam_session
+
+def _upload_sarvam_chunk(session, url, headers, chunk, backoff, max_retries):
+    """
+    Uploads one chunk and returns its transcript, or None if it failed for good.
+    """
+    index = chunk["index"]
+    payload = encode_wav(chunk["samples"], chunk["sample_rate"])
+
+    for attempt in range(max_retries + 1):
+        backoff.wait()
         try:
-            with open(chunk_path, "rb") as f:
-                files = {"file": (os.path.basename(chunk_path), f, "audio/wav")}
-                data = {"model": "saaras:v3"}
-                response = requests.post(url, headers=headers, files=files, data=data)
+            files = {"file": (chunk["name"], payload, "audio/wav")}
+            data = {"model": "saaras:v3"}
+            response = session.post(url, headers=headers, files=files, data=data, timeout=120)
+        except requests.RequestException as e:
+            print(f"[DEBUG] Error processing chunk {index} (attempt {attempt+1}): {e}")
+            time.sleep(1)
+            continue
+
+        if response.status_code == 200:
+            try:
+                return response.json().get("transcript", "")
+            except (ValueError, AttributeError):
+                # Not a JSON object; treat it like a transient server error
+                print(f"[DEBUG] Sarvam Chunk {index} returned an unreadable body (attempt {attempt+1}): {response.text[:200]}")
+                time.sleep(1)
+                continue
+        elif response.status_code == 429 or response.status_code >= 500:
+            wait = backoff.rate_limited(attempt, response.headers.get("Retry-After"))
+            print(f"[DEBUG] Sarvam Chunk {index} got {response.status_code}. Backing off {wait:.1f}s...")
+        else:
+            print(f"[DEBUG] Sarvam Chunk {index} Failed ({response.status_code}): {response.text}")
+            return None
+
+    print(f"[DEBUG] Sarvam Chunk {index} gave up after {max_retries + 1} attempts")
+    return None
+
+def _transcribe_chunk_locally(chunk, language):
+    """
+    Whisper transcript of one Sarvam chunk, with timestamps moved onto the full timeline.
+    """
+    preset = get_whisper_preset()
+    samples = to_float32(chunk["samples"])
+    try:
+        segments, _ = _get_whisper_model().transcribe(samples, language=language, beam_size=preset["beam_size"])
+        return [
+            {"start": chunk["start"] + seg.start, "end": chunk["start"] + seg.end, "text": seg.text.strip()}
+            for seg in segments
+        ]
+    except Exception as e:
+        print(f"[DEBUG] Local Whisper fallback for chunk {chunk['index']} failed: {e}")
+        return []
+
+def _iter_sarvam_chunks(chunks, api_key, language=None):
+    """
+    Uploads chunks concurrently over a pooled session and yields each chunk's
+    segments in chunk order, as soon as that chunk (and all before it) returned.
+
+    A chunk that fails for good is handed to local Whisper the moment its upload
+    gives up, so it is re-transcribed while the remaining uploads are still in
+    flight and merged back at its own offset.
+    """
+    config = get_sarvam_config()
+    url = config["stt_url"]
+    headers = {"api-subscription-key": api_key}
+    workers = max(1, config["max_workers"])
+    session = _get_sarvam_session(workers)
+    backoff = _SharedBackoff()
+
+    fallbacks = {}
+    fallback_lock = threading.Lock()
+
+    # One thread: the shared Whisper model runs one transcription at a time
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sarvam-upload") as pool, \
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="whisper-fallback") as local_pool:
+
+        def fallback(chunk):
+            # Called from the upload's done-callback and from the consumer; submits once
+            with fallback_lock:
+                if chunk["index"] not in fallbacks:
+                    print(f"[DEBUG] Sarvam Chunk {chunk['index']} failed, transcribing it locally with Whisper")
+                    fallbacks[chunk["index"]] = local_pool.submit(_transcribe_chunk_locally, chunk, language)
+                return fallbacks[chunk["index"]]
+
+        def on_done(chunk, future):
+            if future.exception() is not None or future.result() is None:
+                fallback(chunk)
+
+        futures = []
+        for chunk in chunks:
+            future = pool.submit(_upload_sarvam_chunk, session, url, headers, chunk, backoff, config["max_retries"])
+            future.add_done_callback(lambda f, chunk=chunk: on_done(chunk, f))
+            futures.append(future)
+
+        for chunk, future in zip(chunks, futures):
+            try:
+                transcript = future.result()
+            except Exception as e:
+                print(f"[DEBUG] Error processing chunk {chunk['index']}: {e}")
+                transcript = None
+            print(f"[DEBUG] Processed chunk {chunk['index']+1}/{len(chunks)} ({chunk['start']:.1f}s - {chunk['end']:.1f}s)")
+
+            if transcript is None:
+                yield from fallback(chunk).result()
+                continue
+            if not transcript:
+                continue
+
+            words = transcript.split()
+            # Simple segmentation of the transcript for this chunk
+            words_per_seg = 12
+            total_offset = chunk["start"]
+            chunk_duration = chunk["end"] - chunk["start"]
             
-            if response.status_code == 200:
-                transcript = response.json().get("transcript", "")
-                words = transcript.split()
-                # Simple segmentation of the transcript for this chunk
-                words_per_seg = 12
-                chunk_duration = 29.0 # Assume approx 29s except maybe for last
+            for j in range(0, len(words), words_per_seg):
+                seg_text = " ".join(words[j:j+words_per_seg])
+                # Estimated timestamps within the chunk
+                rel_start = (j / max(1, len(words))) * chunk_duration
+                rel_end = (min(j + words_per_seg, len(words)) / max(1, len(words))) * chunk_duration
                 
-                for j in range(0, len(words), words_per_seg):
-                    seg_text = " ".join(words[j:j+words_per_seg])
-                    # Estimated timestamps within the chunk
-                    rel_start = (j / max(1, len(words))) * chunk_duration
-                    rel_end = ((j + words_per_seg) / max(1, len(words))) * chunk_duration
-                    
-                    all_results.append({
-                        "start": total_offset + rel_start,
-                        "end": total_offset + rel_end,
-                        "text": seg_text
-                    })
-                total_offset += 29.0
-            else:
-                print(f"[DEBUG] Sarvam Chunk {i} Failed ({response.status_code}): {response.text}")
-        except Exception as e:
-            print(f"[DEBUG] Error processing chunk {i}: {e}")
-
-    if not all_results:
-        print("[DEBUG] No transcripts received from Sarvam. Falling back.")
-        return _transcribe_whisper(audio_path)
-
-    # Heuristic for language detection
-    search_path = (video_path or audio_path).lower()
-    if "telugu" in search_path or "te" in search_path:
-        lang = "te"
-    elif "hindi" in search_path or "hi" in search_path:
-        lang = "hi"
-    elif "marathi" in search_path or "mr" in search_path:
-        lang = "mr"
-    elif "tamil" in search_path or "ta" in search_path:
-        lang = "ta"
-    else:
-        lang = "hi" # Default to hindi for indian context
+                yield {
+                    "start": total_offset + rel_start,
+                    "end": total_offset + rel_end,
+                    "text": seg_text
+                }
+
+        if fallbacks:
+            print(f"[DEBUG] {len(fallbacks)}/{len(chunks)} Sarvam chunks were transcribed locally with Whisper")
 
-    print(f"[DEBUG] Sarvam complete. Total segments: {len(all_results)}. Heuristic Language: {lang}")
-    return all_results, lang
+def load_whisper_model():
+    """
+    Loads the Whisper model ahead of the first transcription.
+    """
+    return _get_whisper_model()
 
 def unload_whisper_model():
     """
     Clears the STT models from memory.
     """
-    global _whisper_model
+    global _whisper_model, _whisper_model_key
     import gc
+    from processor.parallel_stt import shutdown_pool
     if _whisper_model is not None:
         del _whisper_model
         _whisper_model = None
+        _whisper_model_key = None
+    shutdown_pool()
     gc.collect()
     if torch.cuda.is_available():
         torch.cuda.empty_cache()
@@ -1,31 +1,56 @@
-import os
+import wave
 import subprocess
+import numpy as np
 
-def extract_audio(video_path):
+SAMPLE_RATE = 16000
+
+def _pcm_command(video_path, sample_rate):
+    # Mono float32 PCM on stdout: the format faster-whisper works on internally
+    return [
+        "ffmpeg", "-v", "error", "-nostdin",
+        "-i", video_path,
+        "-vn", "-ac", "1", "-ar", str(sample_rate),
+        "-f", "f32le", "-acodec", "pcm_f32le",
+        "pipe:1"
+    ]
+
+def decode_audio(video_path, sample_rate=SAMPLE_RATE):
     """
-    Extract audio from video.
+    Decodes the video's audio track straight into one contiguous float32 array
+    (mono, sample_rate Hz, range -1..1) through an ffmpeg pipe, without an
+    intermediate WAV file. faster-whisper and the chunkers take the array directly.
     """
-    print(f"[DEBUG] Extracting audio from: {video_path}")
-    os.makedirs("temp", exist_ok=True)
-    audio_path = "temp/audio_for_transcription.wav"
+    print(f"[DEBUG] Decoding audio from: {video_path}")
+    proc = subprocess.Popen(_pcm_command(video_path, sample_rate), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    # bytearray grows in place, and frombuffer wraps it without another copy
+    buffer = bytearray()
+    while True:
+        block = proc.stdout.read(1 << 20)
+        if not block:
+            break
+        buffer += block
+    stderr = proc.stderr.read().decode("utf-8", errors="replace")
+    proc.wait()
+
+    if proc.returncode != 0:
+        print(f"[DEBUG] FFmpeg ERROR: {stderr}")
+    usable = len(buffer) - len(buffer) % 4
+    del buffer[usable:]
+    samples = np.frombuffer(buffer, dtype=np.float32)
+    print(f"[DEBUG] Audio decoded: {len(samples) / sample_rate:.1f}s ({len(buffer)} bytes in memory)")
+    return samples
 
+def get_audio_duration(audio_path):
+    """
+    Duration in seconds of an extracted WAV file or a decoded sample array
+    (0.0 if it can't be read).
+    """
+    if isinstance(audio_path, np.ndarray):
+        return len(audio_path) / float(SAMPLE_RATE)
     try:
-        result = subprocess.run([
-            "ffmpeg", "-i", video_path,
-            "-ar", "16000", "-ac", "1",
-            audio_path, "-y"
-        ], capture_output=True, text=True)
-        
-        if result.returncode != 0:
-            print(f"[DEBUG] FFmpeg ERROR: {result.stderr}")
-        
-        if os.path.exists(audio_path):
-            size = os.path.getsize(audio_path)
-            print(f"[DEBUG] Audio extracted to {audio_path} ({size} bytes)")
-        else:
-            print(f"[DEBUG] ERROR: Audio file was not created by FFmpeg")
-            
+        with wave.open(audio_path, "rb") as wf:
+            return wf.getnframes() / float(wf.getframerate())
     except Exception as e:
-        print(f"[DEBUG] ERROR during audio extraction: {e}")
-
-    return audio_path
+        print(f"[DEBUG] Could not read audio duration: {e}")
+        return 0.0
@@ -0,0 +1,40 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from processor.config import get_workspace_dir
+
+def create_workspace(prefix="job"):
+    """
+    Creates a private scratch directory for one job and returns its path.
+    Nothing else writes there, so concurrent jobs never clobber each other's files.
+    """
+    root = get_workspace_dir()
+    os.makedirs(root, exist_ok=True)
+    return tempfile.mkdtemp(prefix=f"{prefix}_", dir=root)
+
+def link_or_copy(src, dst):
+    """
+    Hard-links src to dst (falling back to a copy across filesystems), so a
+    job keeps its own reference to a shared cache file.
+    """
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+def remove_workspace(path):
+    if path and os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+
+@contextmanager
+def job_workspace(prefix="job"):
+    """
+    Scratch directory that is removed when the block exits, whether it
+    finished, raised or was cancelled.
+    """
+    path = create_workspace(prefix)
+    try:
+        yield path
+    finally:
+        remove_workspace(path)